@@ -5,6 +5,7 @@
 from django.contrib.auth.models import User
 from django.contrib.auth.forms import UserCreationForm, AuthenticationForm
 from django import forms
+from monitoring.tracing import traced
 
 
 class LoginForm(AuthenticationForm):
@@ -48,6 +49,7 @@ class SignUpForm(UserCreationForm):
 
     admin = forms.BooleanField(required=False)
 
+    @traced
     def save(self, commit=True):
         """
         Overriding save method.
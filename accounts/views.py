@@ -11,6 +11,7 @@ from django.contrib import messages
 from django.contrib.auth.mixins import LoginRequiredMixin
 from django.db.models import Q
 from accounts.forms import SignUpForm, LoginForm, UpdateUserForm
+from store.pagination import CursorPaginationMixin
 
 # Create your views here.
 
@@ -90,7 +91,7 @@ class DeleteUser(PermissionRequiredMixin, LoginRequiredMixin, DeleteView):
         return context
 
 
-class ListUser(LoginRequiredMixin, ListView):
+class ListUser(LoginRequiredMixin, CursorPaginationMixin, ListView):
     """
     List all users.
     """
@@ -111,7 +112,7 @@ class UserLoginView(LoginView):
     next_page = reverse_lazy("store:equipment-types")
 
 
-class SearchUser(LoginRequiredMixin, ListView):
+class SearchUser(LoginRequiredMixin, CursorPaginationMixin, ListView):
     """
     Search User.
     """
@@ -11,7 +11,7 @@ https://docs.djangoproject.com/en/4.2/ref/settings/
 """
 
 from pathlib import Path
-from decouple import config
+from decouple import Csv, config
 import dj_database_url
 import os
 
@@ -42,6 +42,7 @@ if DEBUG :
 INSTALLED_APPS = [
     "store.apps.StoreConfig",
     "accounts.apps.AccountsConfig",
+    "monitoring.apps.MonitoringConfig",
     "django.contrib.admin",
     "django.contrib.auth",
     "django.contrib.contenttypes",
@@ -51,6 +52,10 @@ INSTALLED_APPS = [
 ]
 
 MIDDLEWARE = [
+    "monitoring.metrics.MetricsMiddleware",
+    "monitoring.tracing.TracingMiddleware",
+    "monitoring.middleware.SQLInstrumentationMiddleware",
+    "monitoring.nplusone.NPlusOneMiddleware",
     "django.middleware.security.SecurityMiddleware",
     "django.contrib.sessions.middleware.SessionMiddleware",
     "django.middleware.common.CommonMiddleware",
@@ -58,8 +63,45 @@ MIDDLEWARE = [
     "django.contrib.auth.middleware.AuthenticationMiddleware",
     "django.contrib.messages.middleware.MessageMiddleware",
     "django.middleware.clickjacking.XFrameOptionsMiddleware",
+    "monitoring.profiling.ProfilingMiddleware",
 ]
 
+# Count SQL of every request, add a Server-Timing header and log requests
+# slower than SLOW_REQUEST_MS milliseconds.
+SQL_INSTRUMENTATION = config("SQL_INSTRUMENTATION", default=False, cast=bool)
+SLOW_REQUEST_MS = config("SLOW_REQUEST_MS", default=500, cast=int)
+
+# Warn or raise when a request runs the same query more than
+# NPLUSONE_THRESHOLD times from one place: off, warn or raise.
+NPLUSONE_DETECTION = config("NPLUSONE_DETECTION", default="off")
+NPLUSONE_THRESHOLD = config("NPLUSONE_THRESHOLD", default=3, cast=int)
+
+# Prometheus metrics at /metrics. Gunicorn workers share them through
+# PROMETHEUS_MULTIPROC_DIR, which must exist and be emptied before start.
+# Scrapes come from METRICS_ALLOWED_IPS or send METRICS_TOKEN as a bearer
+# token.
+METRICS = config("METRICS", default=False, cast=bool)
+METRICS_ALLOWED_IPS = config("METRICS_ALLOWED_IPS", default="127.0.0.1,::1", cast=Csv())
+METRICS_TOKEN = config("METRICS_TOKEN", default="")
+PROMETHEUS_MULTIPROC_DIR = config("PROMETHEUS_MULTIPROC_DIR", default="")
+if PROMETHEUS_MULTIPROC_DIR:
+    os.environ.setdefault("PROMETHEUS_MULTIPROC_DIR", PROMETHEUS_MULTIPROC_DIR)
+
+# cProfile requests of staff asking with ?profile=1 or an X-Profile header,
+# and one in PROFILING_SAMPLE_RATE requests when set. The newest
+# PROFILING_KEEP profiles are kept in PROFILING_DIR.
+PROFILING = config("PROFILING", default=False, cast=bool)
+PROFILING_SAMPLE_RATE = config("PROFILING_SAMPLE_RATE", default=0, cast=int)
+PROFILING_DIR = config("PROFILING_DIR", default=str(BASE_DIR / "profiles"))
+PROFILING_KEEP = config("PROFILING_KEEP", default=100, cast=int)
+
+# Record spans of traced functions and SQL in one in TRACING_SAMPLE_RATE
+# requests. The newest TRACING_BUFFER_SIZE traces of every process are
+# shown at /admin/traces/, and all are appended to TRACING_FILE when set.
+TRACING_SAMPLE_RATE = config("TRACING_SAMPLE_RATE", default=0, cast=int)
+TRACING_BUFFER_SIZE = config("TRACING_BUFFER_SIZE", default=200, cast=int)
+TRACING_FILE = config("TRACING_FILE", default="")
+
 ROOT_URLCONF = "inventory_store.urls"
 
 TEMPLATES = [
@@ -89,6 +131,8 @@ DATABASES = {
     "default": {
         "ENGINE": "django.db.backends.sqlite3",
         "NAME": BASE_DIR / "db.sqlite3",
+        # A file lets concurrency tests wait on locks like a real database.
+        "TEST": {"NAME": BASE_DIR / "test_db.sqlite3"},
     }
 }
 
@@ -21,6 +21,8 @@ from django.conf import settings
 from django.conf.urls.static import static
 
 urlpatterns = [
+    # Monitoring adds pages under admin/, so it comes before the admin.
+    path("", include("monitoring.urls")),
     path("admin/", admin.site.urls),
     path("", include("accounts.urls")),
     path("", include("store.urls")),
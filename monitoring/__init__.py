@@ -0,0 +1,3 @@
+"""
+    Module name :- __init__
+"""
@@ -0,0 +1,14 @@
+"""
+    Module name :- apps
+"""
+
+from django.apps import AppConfig
+
+
+class MonitoringConfig(AppConfig):
+    """
+    App configuration.
+    """
+
+    default_auto_field = "django.db.models.BigAutoField"
+    name = "monitoring"
@@ -0,0 +1,114 @@
+"""
+    Module name :- metrics
+"""
+
+import os
+import time
+
+from django.conf import settings
+from django.core.exceptions import MiddlewareNotUsed
+from django.db import transaction
+from monitoring.middleware import record_response
+from prometheus_client import (
+    REGISTRY,
+    CollectorRegistry,
+    Counter,
+    Histogram,
+    generate_latest,
+    multiprocess,
+)
+
+REQUESTS = Counter(
+    "inventory_requests_total",
+    "Requests by view, method and status.",
+    ["view", "method", "status"],
+)
+REQUEST_DURATION = Histogram(
+    "inventory_request_duration_seconds",
+    "Request latency by view.",
+    ["view", "method"],
+)
+REQUEST_DB_DURATION = Histogram(
+    "inventory_request_db_duration_seconds",
+    "SQL time of a request by view.",
+    ["view", "method"],
+)
+ALLOCATIONS_CREATED = Counter(
+    "inventory_allocations_created_total", "Allocations created."
+)
+ALLOCATIONS_RETURNED = Counter(
+    "inventory_allocations_returned_total", "Allocations returned."
+)
+
+
+def record_allocations(created=0, returned=0):
+    """
+    Count created and returned allocations once the transaction commits.
+    """
+
+    def record():
+        """
+        Increment allocation counters.
+        """
+        if created:
+            ALLOCATIONS_CREATED.inc(created)
+        if returned:
+            ALLOCATIONS_RETURNED.inc(returned)
+
+    if created or returned:
+        transaction.on_commit(record)
+
+
+def get_metrics():
+    """
+    Get metrics in Prometheus text format.
+
+    With ``PROMETHEUS_MULTIPROC_DIR`` set, every worker process writes its
+    values to files in the directory and the metrics of all workers are
+    summed here.
+    """
+    if "PROMETHEUS_MULTIPROC_DIR" in os.environ:
+        registry = CollectorRegistry()
+        multiprocess.MultiProcessCollector(registry)
+    else:
+        registry = REGISTRY
+    return generate_latest(registry)
+
+
+class MetricsMiddleware:
+    """
+    Count requests and observe their latency and SQL time by view name.
+
+    Django drops the middleware when ``METRICS`` is off.
+    """
+
+    def __init__(self, get_response):
+        """
+        Enable the middleware when configured.
+        """
+        if not settings.METRICS:
+            raise MiddlewareNotUsed
+        self.get_response = get_response
+
+    def __call__(self, request):
+        """
+        Handle the request and record its metrics.
+
+        Streaming responses are recorded once their content is read, so
+        latency and SQL time include the streaming.
+        """
+        start = time.perf_counter()
+
+        def finish(response, recorder):
+            """
+            Observe the request.
+            """
+            duration = time.perf_counter() - start
+            match = request.resolver_match
+            view = match.view_name if match else "unmatched"
+
+            REQUESTS.labels(view, request.method, response.status_code).inc()
+            REQUEST_DURATION.labels(view, request.method).observe(duration)
+            REQUEST_DB_DURATION.labels(view, request.method).observe(recorder.duration)
+
+        return record_response(request, self.get_response, finish)
@@ -0,0 +1,190 @@
+"""
+    Module name :- middleware
+"""
+
+import functools
+import logging
+import time
+from collections import Counter
+from contextlib import ExitStack, contextmanager, nullcontext
+
+from django.conf import settings
+from django.core.exceptions import MiddlewareNotUsed
+from django.db import connections
+
+logger = logging.getLogger(__name__)
+
+TOP_STATEMENTS = 3
+
+
+class QueryRecorder:
+    """
+    Database execute wrapper counting statements and their time.
+    """
+
+    def __init__(self):
+        """
+        Start with no statements.
+        """
+        self.count = 0
+        self.duration = 0.0
+        self.statements = Counter()
+
+    def __call__(self, execute, sql, params, many, context):
+        """
+        Run a statement and record it.
+        """
+        start = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            self.duration += time.perf_counter() - start
+            self.count += 1
+            self.statements[sql] += 1
+
+    @property
+    def duplicates(self):
+        """
+        Number of statements that repeat an earlier statement.
+
+        Parameters are not part of the statement, so a query run once per
+        row of a list counts as duplicates.
+        """
+        return sum(count - 1 for count in self.statements.values() if count > 1)
+
+    def get_repeated(self, limit=TOP_STATEMENTS):
+        """
+        Get the most repeated statements with their counts.
+        """
+        return [
+            (sql, count)
+            for sql, count in self.statements.most_common(limit)
+            if count > 1
+        ]
+
+
+@contextmanager
+def install_recorder(recorder):
+    """
+    Run a query recorder on every connection inside the block.
+    """
+    with ExitStack() as stack:
+        for connection in connections.all():
+            stack.enter_context(connection.execute_wrapper(recorder))
+        yield recorder
+
+
+def stream_inside(content, get_context, finish):
+    """
+    Yield streamed content, reading every chunk inside a fresh context.
+
+    The context is entered around every chunk rather than held between
+    chunks, so it is left clean however the server iterates. ``finish``
+    runs once the content is read or the response is closed.
+    """
+    iterator = iter(content)
+    try:
+        while True:
+            with get_context():
+                try:
+                    chunk = next(iterator)
+                except StopIteration:
+                    return
+            yield chunk
+    finally:
+        finish()
+
+
+def record_response(request, get_response, finish):
+    """
+    Get a response with its queries recorded and call finish after it.
+
+    The outermost middleware installs one recorder on every connection and
+    keeps it as ``request.queries``; inner ones share it, so a statement is
+    wrapped and timed once. A streaming response runs its queries while its
+    content is read, so the recorder stays installed until then and
+    ``finish(response, recorder)`` runs once the stream ends; otherwise it
+    runs before the response is returned.
+    """
+    recorder = getattr(request, "queries", None)
+    if recorder is None:
+        recorder = QueryRecorder()
+        request.queries = recorder
+        get_context = functools.partial(install_recorder, recorder)
+    else:
+        get_context = nullcontext
+
+    with get_context():
+        response = get_response(request)
+
+    if response.streaming:
+        response.streaming_content = stream_inside(
+            response.streaming_content,
+            get_context,
+            functools.partial(finish, response, recorder),
+        )
+    else:
+        finish(response, recorder)
+    return response
+
+
+class SQLInstrumentationMiddleware:
+    """
+    Record SQL of every request.
+
+    Adds a Server-Timing header with the SQL and total time and logs
+    requests slower than ``SLOW_REQUEST_MS`` with their most repeated
+    statements. Django drops the middleware when ``SQL_INSTRUMENTATION`` is
+    off, so it costs nothing then.
+    """
+
+    def __init__(self, get_response):
+        """
+        Enable the middleware when configured.
+        """
+        if not settings.SQL_INSTRUMENTATION:
+            raise MiddlewareNotUsed
+        self.get_response = get_response
+        self.slow_request_ms = settings.SLOW_REQUEST_MS
+
+    def __call__(self, request):
+        """
+        Wrap database connections while the request is handled.
+
+        The header goes out before a streamed body, so it only covers what
+        ran before the body; the slow request check waits for the stream.
+        """
+        start = time.perf_counter()
+
+        def finish(response, recorder):
+            """
+            Log the request when it was slow.
+            """
+            total_ms = (time.perf_counter() - start) * 1000
+            if total_ms >= self.slow_request_ms:
+                self.log_slow_request(
+                    request, total_ms, recorder.duration * 1000, recorder
+                )
+
+        response = record_response(request, self.get_response, finish)
+
+        total_ms = (time.perf_counter() - start) * 1000
+        db_ms = request.queries.duration * 1000
+        response["Server-Timing"] = (
+            f'db;dur={db_ms:.1f};desc="{request.queries.count} queries, '
+            f'{request.queries.duplicates} duplicates", total;dur={total_ms:.1f}'
+        )
+        return response
+
+    def log_slow_request(self, request, total_ms, db_ms, recorder):
+        """
+        Log a slow request with its most repeated statements.
+        """
+        lines = [
+            f"Slow request {request.method} {request.path} took {total_ms:.1f}ms, "
+            f"{db_ms:.1f}ms in {recorder.count} queries "
+            f"with {recorder.duplicates} duplicates."
+        ]
+        for sql, count in recorder.get_repeated():
+            lines.append(f"  {count}x {sql}")
+        logger.warning("\n".join(lines))
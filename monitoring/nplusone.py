@@ -0,0 +1,195 @@
+"""
+    Module name :- nplusone
+"""
+
+import os
+import sys
+import warnings
+from collections import Counter
+from contextlib import ExitStack
+
+from django.conf import settings
+from django.core.exceptions import ImproperlyConfigured, MiddlewareNotUsed
+from django.db import connections
+
+MONITORING_DIR = os.path.dirname(os.path.abspath(__file__))
+ACTIONS = ("off", "warn", "raise")
+
+
+class NPlusOneError(AssertionError):
+    """
+    Same query ran once per row.
+    """
+
+
+class NPlusOneWarning(UserWarning):
+    """
+    Same query ran once per row.
+    """
+
+
+def get_template_site(frame):
+    """
+    Get "template line N" of the innermost template node being rendered.
+    """
+    while frame is not None:
+        if frame.f_code.co_name == "render_annotated":
+            node = frame.f_locals.get("self")
+            origin = getattr(node, "origin", None)
+            token = getattr(node, "token", None)
+            if origin is not None and token is not None:
+                name = origin.template_name or origin.name
+                return f"{name} line {token.lineno}"
+        frame = frame.f_back
+    return None
+
+
+def get_call_site(frame):
+    """
+    Get "file:line in function" of the innermost project frame.
+    """
+    base_dir = str(settings.BASE_DIR)
+    while frame is not None:
+        filename = frame.f_code.co_filename
+        if (
+            filename.startswith(base_dir)
+            and not filename.startswith(MONITORING_DIR)
+            and "site-packages" not in filename
+        ):
+            return (
+                f"{os.path.relpath(filename, base_dir)}:{frame.f_lineno} "
+                f"in {frame.f_code.co_name}"
+            )
+        frame = frame.f_back
+    return None
+
+
+def get_lazy_load(frame):
+    """
+    Get the relation or deferred field whose lazy load ran the query.
+    """
+    while frame is not None:
+        name = frame.f_code.co_name
+        owner = frame.f_locals.get("self")
+        if name == "get_object" and hasattr(owner, "field"):
+            return f"{owner.field.model.__name__}.{owner.field.name}"
+        if name == "refresh_from_db" and frame.f_locals.get("fields"):
+            fields = ", ".join(frame.f_locals["fields"])
+            return f"{type(owner).__name__}.{fields} (deferred)"
+        frame = frame.f_back
+    return None
+
+
+class NPlusOneDetector:
+    """
+    Context manager finding queries that run once per row.
+
+    Queries are grouped by statement, call site and template line. A group
+    of more than ``threshold`` queries is a violation: the same query with
+    different parameters from the same place, which is what lazy relation
+    loads and per-row counts in a loop look like. Violations raise
+    NPlusOneError or warn with NPlusOneWarning when the block exits.
+    """
+
+    def __init__(self, threshold=None, action=None):
+        """
+        Use the configured threshold and action by default.
+        """
+        self.threshold = (
+            threshold if threshold is not None else settings.NPLUSONE_THRESHOLD
+        )
+        self.action = action or settings.NPLUSONE_DETECTION
+        self.queries = Counter()
+        self.stack = None
+
+    def __call__(self, execute, sql, params, many, context):
+        """
+        Execute wrapper recording where a statement came from.
+        """
+        frame = sys._getframe(1)
+        self.queries[
+            (
+                sql,
+                get_call_site(frame),
+                get_template_site(frame),
+                get_lazy_load(frame),
+            )
+        ] += 1
+        return execute(sql, params, many, context)
+
+    def __enter__(self):
+        """
+        Start recording queries on every connection.
+        """
+        self.stack = ExitStack()
+        for connection in connections.all():
+            self.stack.enter_context(connection.execute_wrapper(self))
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        """
+        Stop recording and report violations.
+        """
+        self.stack.close()
+        if exc_type is None:
+            self.report()
+
+    @property
+    def violations(self):
+        """
+        Get ((sql, call site, template site, lazy load), count) of violations.
+        """
+        return [
+            (key, count)
+            for key, count in self.queries.items()
+            if count > self.threshold
+        ]
+
+    def report(self):
+        """
+        Raise or warn about violations.
+        """
+        violations = self.violations
+        if not violations or self.action == "off":
+            return
+
+        lines = [f"{len(violations)} queries ran once per row:"]
+        for (sql, call_site, template_site, lazy_load), count in violations:
+            lines.append(f"  {count}x {sql}")
+            if lazy_load:
+                lines.append(f"    lazy load of {lazy_load}")
+            if template_site:
+                lines.append(f"    from template {template_site}")
+            if call_site:
+                lines.append(f"    from {call_site}")
+        message = "\n".join(lines)
+
+        if self.action == "raise":
+            raise NPlusOneError(message)
+        warnings.warn(message, NPlusOneWarning, stacklevel=2)
+
+
+class NPlusOneMiddleware:
+    """
+    Detect N+1 queries of every request.
+
+    Django drops the middleware unless ``NPLUSONE_DETECTION`` is warn or
+    raise, so it is meant for development.
+    """
+
+    def __init__(self, get_response):
+        """
+        Enable the middleware when configured.
+        """
+        if settings.NPLUSONE_DETECTION not in ACTIONS:
+            raise ImproperlyConfigured(f"NPLUSONE_DETECTION must be one of {ACTIONS}.")
+        if settings.NPLUSONE_DETECTION == "off":
+            raise MiddlewareNotUsed
+        self.get_response = get_response
+
+    def __call__(self, request):
+        """
+        Handle the request inside a detector.
+        """
+        with NPlusOneDetector():
+            return self.get_response(request)
@@ -0,0 +1,135 @@
+"""
+    Module name :- profiling
+"""
+
+import cProfile
+import io
+import pstats
+import random
+import re
+import time
+from datetime import datetime
+from datetime import timezone as dt_timezone
+from pathlib import Path
+
+from django.conf import settings
+from django.core.exceptions import MiddlewareNotUsed
+from django.utils import timezone
+from django.utils.text import slugify
+
+PROFILE_NAME = re.compile(
+    r"^(?P<created>\d{8}T\d{12})-(?P<duration>\d+)ms-(?P<method>[A-Z]+)-"
+    r"(?P<path>[\w-]+)\.prof$"
+)
+
+
+def get_profile_path(name):
+    """
+    Get path of a saved profile, or None for names that are not profiles.
+    """
+    if not PROFILE_NAME.match(name):
+        return None
+    path = Path(settings.PROFILING_DIR) / name
+    return path if path.is_file() else None
+
+
+def get_profiles():
+    """
+    Get saved profiles, newest first.
+    """
+    directory = Path(settings.PROFILING_DIR)
+    if not directory.is_dir():
+        return []
+
+    profiles = []
+    for path in directory.iterdir():
+        match = PROFILE_NAME.match(path.name)
+        if match:
+            profiles.append(
+                {
+                    "name": path.name,
+                    "created": datetime.strptime(
+                        match["created"], "%Y%m%dT%H%M%S%f"
+                    ).replace(tzinfo=dt_timezone.utc),
+                    "duration": int(match["duration"]),
+                    "method": match["method"],
+                    "path": match["path"],
+                    "size": path.stat().st_size,
+                }
+            )
+    return sorted(profiles, key=lambda profile: profile["name"], reverse=True)
+
+
+def get_stats(path, limit=50):
+    """
+    Get the functions with the most cumulative time of a profile as text.
+    """
+    output = io.StringIO()
+    stats = pstats.Stats(str(path), stream=output)
+    stats.sort_stats(pstats.SortKey.CUMULATIVE).print_stats(limit)
+    return output.getvalue()
+
+
+def save_profile(profiler, request, duration):
+    """
+    Save a profile and remove the oldest ones above ``PROFILING_KEEP``.
+    """
+    directory = Path(settings.PROFILING_DIR)
+    directory.mkdir(parents=True, exist_ok=True)
+
+    path = slugify(request.path.replace("/", " "))[:80] or "root"
+    name = (
+        f"{timezone.now():%Y%m%dT%H%M%S%f}-{round(duration * 1000)}ms-"
+        f"{request.method}-{path}.prof"
+    )
+    profiler.dump_stats(directory / name)
+
+    for profile in get_profiles()[settings.PROFILING_KEEP :]:
+        (directory / profile["name"]).unlink(missing_ok=True)
+    return name
+
+
+class ProfilingMiddleware:
+    """
+    Profile requests with cProfile.
+
+    Staff can profile a request with a ``profile`` query parameter or an
+    ``X-Profile`` header, and one in ``PROFILING_SAMPLE_RATE`` requests is
+    profiled when the rate is set. Other requests only pay for these
+    checks. Django drops the middleware when ``PROFILING`` is off.
+    """
+
+    def __init__(self, get_response):
+        """
+        Enable the middleware when configured.
+        """
+        if not settings.PROFILING:
+            raise MiddlewareNotUsed
+        self.get_response = get_response
+        self.sample_rate = settings.PROFILING_SAMPLE_RATE
+
+    def is_requested(self, request):
+        """
+        Check whether staff asked to profile the request.
+        """
+        return (
+            "HTTP_X_PROFILE" in request.META or "profile" in request.GET
+        ) and request.user.is_staff
+
+    def __call__(self, request):
+        """
+        Handle the request, under the profiler when it is picked.
+        """
+        requested = self.is_requested(request)
+        sampled = self.sample_rate and random.randrange(self.sample_rate) == 0
+        if not (requested or sampled):
+            return self.get_response(request)
+
+        profiler = cProfile.Profile()
+        start = time.perf_counter()
+        response = profiler.runcall(self.get_response, request)
+        name = save_profile(profiler, request, time.perf_counter() - start)
+
+        if requested:
+            response["X-Profile"] = name
+        return response
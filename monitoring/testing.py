@@ -0,0 +1,39 @@
+"""
+    Module name :- testing
+"""
+
+from django.test import Client
+from monitoring.nplusone import NPlusOneDetector
+
+
+class NPlusOneClient(Client):
+    """
+    Test client failing requests that run a query once per row.
+    """
+
+    def request(self, **request):
+        """
+        Make a request inside a raising detector.
+
+        Streaming responses run their queries while the content is read, so
+        the content is read inside the detector and kept for the test.
+        """
+        with NPlusOneDetector(action="raise"):
+            response = super().request(**request)
+            if response.streaming:
+                response.streaming_content = [b"".join(response.streaming_content)]
+            return response
+
+
+class NPlusOneTestMixin:
+    """
+    Test case mixin making every test client request fail on N+1 queries.
+    """
+
+    client_class = NPlusOneClient
+
+    def assertNoNPlusOne(self, threshold=None):
+        """
+        Fail when code in the block runs a query once per row.
+        """
+        return NPlusOneDetector(threshold=threshold, action="raise")
@@ -0,0 +1,283 @@
+"""
+    Module name :- tests.
+"""
+
+import tempfile
+from pathlib import Path
+
+from django.contrib.auth.models import User
+from django.core.cache import cache
+from django.test import Client, TestCase, override_settings
+from django.urls import reverse
+from monitoring.profiling import get_profile_path
+from prometheus_client import REGISTRY
+from store.models import Allocation, Equipment, EquipmentType
+from monitoring.tracing import traces
+
+
+@override_settings(METRICS=True, METRICS_ALLOWED_IPS=["10.0.0.1"], METRICS_TOKEN="t0k")
+class MetricsTest(TestCase):
+    """
+    Access to Prometheus metrics.
+    """
+
+    def test_only_allowed_addresses_and_token_read_metrics(self):
+        """
+        Other scrapers are refused.
+        """
+        url = reverse("monitoring:metrics")
+
+        for headers, status_code in (
+            ({"REMOTE_ADDR": "10.0.0.2"}, 403),
+            ({"REMOTE_ADDR": "10.0.0.2", "HTTP_AUTHORIZATION": "Bearer bad"}, 403),
+            ({"REMOTE_ADDR": "10.0.0.1"}, 200),
+            ({"REMOTE_ADDR": "10.0.0.2", "HTTP_AUTHORIZATION": "Bearer t0k"}, 200),
+        ):
+            with self.subTest(headers=headers):
+                self.assertEqual(
+                    self.client.get(url, **headers).status_code, status_code
+                )
+
+    def test_streamed_responses_are_observed_after_the_stream(self):
+        """
+        A streaming response is counted once its content is read.
+        """
+        user = User.objects.create_user("clerk", password="password")
+        self.client.force_login(user)
+        labels = {"view": "store:export-allocations", "method": "GET"}
+
+        def get_count():
+            """
+            Get the number of observed exports.
+            """
+            return (
+                REGISTRY.get_sample_value(
+                    "inventory_request_duration_seconds_count", labels
+                )
+                or 0
+            )
+
+        before = get_count()
+        response = self.client.get(
+            reverse("store:export-allocations", args=["csv"]) + "?history=1"
+        )
+        self.assertEqual(get_count(), before)
+
+        b"".join(response.streaming_content)
+        self.assertEqual(get_count(), before + 1)
+
+    def test_admin_and_reopened_allocations_are_counted(self):
+        """
+        Allocations opened or returned outside the allocation views count.
+        """
+        equipment_type = EquipmentType.objects.create(name="Laptop")
+        equipment = Equipment.objects.create(
+            label="Lap-000001",
+            serial_number="SN-1",
+            model_number="MN-1",
+            brand="Brand",
+            price=1000,
+            buy_date="2024-01-01",
+            equipment_type=equipment_type,
+        )
+        user = User.objects.create_user("clerk", password="password")
+        self.client.force_login(
+            User.objects.create_superuser("admin", password="password")
+        )
+
+        def get_counts():
+            """
+            Get the created and returned allocation counts.
+            """
+            return [
+                REGISTRY.get_sample_value(f"inventory_allocations_{name}_total")
+                for name in ("created", "returned")
+            ]
+
+        created, returned = get_counts()
+        data = {
+            "user": user.pk,
+            "equipment": equipment.pk,
+            "allocated_at_0": "2024-01-01",
+            "allocated_at_1": "00:00:00",
+        }
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.client.post(reverse("admin:store_allocation_add"), data)
+        self.assertEqual(get_counts(), [created + 1, returned])
+
+        allocation = Allocation.objects.get(returned=False)
+        with self.captureOnCommitCallbacks(execute=True):
+            self.client.post(
+                reverse("admin:store_allocation_change", args=[allocation.pk]),
+                {**data, "returned": "on"},
+            )
+        self.assertEqual(get_counts(), [created + 1, returned + 1])
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.client.post(
+                reverse("store:update-allocation", args=[allocation.pk]),
+                {"user": user.pk, "equipment": equipment.pk},
+            )
+        self.assertEqual(get_counts(), [created + 2, returned + 1])
+        self.assertTrue(Allocation.objects.filter(returned=False).exists())
+
+
+@override_settings(TRACING_SAMPLE_RATE=1)
+class TracingTest(TestCase):
+    """
+    Request traces.
+    """
+
+    def test_streamed_queries_are_traced(self):
+        """
+        Queries run while a streaming response is read are in its trace.
+        """
+        user = User.objects.create_user("clerk", password="password")
+        self.client.force_login(user)
+        traces.clear()
+
+        response = self.client.get(
+            reverse("store:export-allocations", args=["csv"]) + "?history=1"
+        )
+        self.assertFalse(traces)
+        b"".join(response.streaming_content)
+
+        self.assertEqual(len(traces), 1)
+        self.assertIn("store:export-allocations", traces[-1]["name"])
+        self.assertIn("SQL SELECT", [span["name"] for span in traces[-1]["spans"]])
+
+    def test_equipment_lookups_are_traced(self):
+        """
+        Calls of traced model methods are spans of the request.
+        """
+        self.client.force_login(User.objects.create_user("clerk", password="password"))
+        equipment_type = EquipmentType.objects.create(name="Laptop")
+        cache.clear()
+        traces.clear()
+
+        self.client.get(
+            reverse("store:get_ids") + f"?equipment_type={equipment_type.pk}"
+        )
+
+        spans = [(span["name"], span["depth"]) for span in traces[-1]["spans"]]
+        self.assertIn(("Equipment.get_ids", 0), spans)
+        self.assertIn(("Equipment.get_non_assigned_equipments", 1), spans)
+
+
+class ProfilingTest(TestCase):
+    """
+    Request profiles.
+    """
+
+    def setUp(self):
+        """
+        Profile into a temporary directory.
+        """
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        self.directory = Path(directory.name)
+        settings = override_settings(PROFILING=True, PROFILING_DIR=directory.name)
+        settings.enable()
+        self.addCleanup(settings.disable)
+
+    def test_only_staff_can_ask_for_profiles(self):
+        """
+        Profile requests of other users are handled without profiling.
+        """
+        url = reverse("store:equipment-types")
+        for user, profiled in (
+            (User.objects.create_user("clerk", password="password"), False),
+            (
+                User.objects.create_user("staff", password="password", is_staff=True),
+                True,
+            ),
+        ):
+            with self.subTest(user=user.username):
+                client = Client()
+                client.force_login(user)
+
+                response = client.get(url + "?profile=1")
+
+                self.assertEqual(response.status_code, 200)
+                self.assertEqual("X-Profile" in response, profiled)
+                self.assertEqual(len(list(self.directory.iterdir())), int(profiled))
+
+    def test_profile_path_rejects_other_names(self):
+        """
+        Only existing files named like profiles are served.
+        """
+        name = "20240101T000000000000-5ms-GET-store.prof"
+        (self.directory / name).write_bytes(b"")
+        (self.directory / "notes.txt").write_bytes(b"")
+
+        self.assertEqual(get_profile_path(name), self.directory / name)
+        for other in (
+            "notes.txt",
+            "../" + name,
+            name.replace("GET", "get"),
+            "20240101T000000000000-5ms-GET-other.prof",
+        ):
+            with self.subTest(name=other):
+                self.assertIsNone(get_profile_path(other))
+
+
+@override_settings(SQL_INSTRUMENTATION=True, SLOW_REQUEST_MS=0)
+class SQLInstrumentationTest(TestCase):
+    """
+    SQL instrumentation of requests.
+    """
+
+    def setUp(self):
+        """
+        Create allocations and log in.
+        """
+        user = User.objects.create_user("clerk", password="password")
+        equipment_type = EquipmentType.objects.create(name="Laptop")
+        for number in range(3):
+            equipment = Equipment.objects.create(
+                label=f"Lap-{number:0>6}",
+                serial_number=f"SN-{number}",
+                model_number="MN-1",
+                brand="Brand",
+                price=1000,
+                buy_date="2024-01-01",
+                equipment_type=equipment_type,
+            )
+            Allocation.objects.create(equipment=equipment, user=user)
+        self.client.force_login(user)
+
+    def test_header_and_slow_log(self):
+        """
+        Responses get a Server-Timing header and slow requests are logged.
+        """
+        with self.assertLogs("monitoring.middleware", "WARNING") as logs:
+            response = self.client.get(reverse("store:equipment-types"))
+
+        self.assertRegex(response["Server-Timing"], r'^db;dur=[\d.]+;desc="\d+ queries')
+        self.assertIn("Slow request GET /", logs.output[0])
+
+    def test_streamed_queries_are_logged_after_the_stream(self):
+        """
+        Queries run while a streaming response is read are counted.
+        """
+        with self.assertNoLogs("monitoring.middleware", "WARNING"):
+            response = self.client.get(
+                reverse("store:export-allocations", args=["csv"]) + "?history=1"
+            )
+        header_queries = int(response["Server-Timing"].split('"')[1].split()[0])
+
+        with self.assertLogs("monitoring.middleware", "WARNING") as logs:
+            content = b"".join(response.streaming_content)
+
+        self.assertEqual(len(content.splitlines()), 4)
+        self.assertIn(f"in {header_queries + 1} queries", logs.output[0])
+
+    @override_settings(SQL_INSTRUMENTATION=False)
+    def test_off_by_default(self):
+        """
+        The middleware is dropped when instrumentation is off.
+        """
+        response = self.client.get(reverse("store:equipment-types"))
+
+        self.assertNotIn("Server-Timing", response)
@@ -0,0 +1,249 @@
+"""
+    Module name :- tracing
+"""
+
+import functools
+import json
+import random
+import time
+from collections import deque
+from contextlib import ExitStack
+from contextvars import ContextVar
+
+from django.conf import settings
+from django.core.exceptions import MiddlewareNotUsed
+from django.db import connections
+from django.utils import timezone
+
+MAX_SPANS = 1000
+
+current_trace = ContextVar("current_trace", default=None)
+traces = deque(maxlen=settings.TRACING_BUFFER_SIZE)
+
+
+class Trace:
+    """
+    Spans recorded while handling one request.
+    """
+
+    def __init__(self, name):
+        """
+        Start a trace.
+        """
+        self.name = name
+        self.created = timezone.now()
+        self.start = time.perf_counter()
+        self.duration = 0.0
+        self.depth = 0
+        self.spans = []
+        self.dropped = 0
+
+    def as_dict(self):
+        """
+        Get the trace as a dict with spans in start order.
+        """
+        return {
+            "name": self.name,
+            "created": self.created.isoformat(),
+            "duration": round(self.duration, 3),
+            "dropped": self.dropped,
+            "spans": sorted(self.spans, key=lambda span: span["start"]),
+        }
+
+
+class Span:
+    """
+    Context manager recording a span in the current trace.
+
+    Spans nest by the order they are entered. Outside a trace, as in
+    requests that are not sampled, a span does nothing.
+    """
+
+    __slots__ = ("name", "trace", "start", "depth")
+
+    def __init__(self, name):
+        """
+        Name the span.
+        """
+        self.name = name
+
+    def __enter__(self):
+        """
+        Start the span.
+        """
+        self.trace = current_trace.get()
+        if self.trace is not None:
+            self.depth = self.trace.depth
+            self.trace.depth += 1
+            self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        """
+        End the span and add it to the trace.
+        """
+        trace = self.trace
+        if trace is None:
+            return
+
+        end = time.perf_counter()
+        trace.depth -= 1
+        if len(trace.spans) >= MAX_SPANS:
+            trace.dropped += 1
+            return
+        trace.spans.append(
+            {
+                "name": self.name,
+                "start": round((self.start - trace.start) * 1000, 3),
+                "duration": round((end - self.start) * 1000, 3),
+                "depth": self.depth,
+                "error": exc_type is not None,
+            }
+        )
+
+
+def traced(name=None):
+    """
+    Decorate a function to record its calls as spans.
+
+    Use as ``@traced`` or ``@traced("name")``; the span is named after the
+    function's qualified name by default.
+    """
+
+    def decorator(function):
+        """
+        Wrap the function.
+        """
+        span_name = name or function.__qualname__
+
+        @functools.wraps(function)
+        def wrapper(*args, **kwargs):
+            """
+            Call the function inside a span when a trace is active.
+            """
+            if current_trace.get() is None:
+                return function(*args, **kwargs)
+            with Span(span_name):
+                return function(*args, **kwargs)
+
+        return wrapper
+
+    if callable(name):
+        return traced()(name)
+    return decorator
+
+
+def trace_sql(execute, sql, params, many, context):
+    """
+    Execute wrapper recording statements as spans.
+    """
+    with Span(f"SQL {sql.split(None, 1)[0].upper()}"):
+        return execute(sql, params, many, context)
+
+
+def get_span_stats(trace_dicts):
+    """
+    Get calls and total and average duration per span name.
+    """
+    stats = {}
+    for trace in trace_dicts:
+        for recorded in trace["spans"]:
+            stat = stats.setdefault(recorded["name"], {"calls": 0, "total": 0.0})
+            stat["calls"] += 1
+            stat["total"] += recorded["duration"]
+
+    for stat in stats.values():
+        stat["total"] = round(stat["total"], 3)
+        stat["average"] = round(stat["total"] / stat["calls"], 3)
+    return dict(sorted(stats.items(), key=lambda item: -item[1]["total"]))
+
+
+def save_trace(trace):
+    """
+    Keep a finished trace in the ring buffer and the JSONL file.
+    """
+    trace_dict = trace.as_dict()
+    traces.append(trace_dict)
+
+    if settings.TRACING_FILE:
+        with open(settings.TRACING_FILE, "a", encoding="utf-8") as file:
+            file.write(json.dumps(trace_dict) + "\n")
+
+
+def stream_traced(trace, content, finish):
+    """
+    Yield streamed content with the trace and SQL spans active.
+
+    The trace is entered around every chunk rather than held between
+    chunks, so the context is left clean however the server iterates.
+    """
+    iterator = iter(content)
+    try:
+        while True:
+            token = current_trace.set(trace)
+            try:
+                with ExitStack() as stack:
+                    for connection in connections.all():
+                        stack.enter_context(connection.execute_wrapper(trace_sql))
+                    chunk = next(iterator)
+            except StopIteration:
+                return
+            finally:
+                current_trace.reset(token)
+            yield chunk
+    finally:
+        finish()
+
+
+class TracingMiddleware:
+    """
+    Trace one in ``TRACING_SAMPLE_RATE`` requests.
+
+    A sampled request records spans of traced functions and SQL statements,
+    including those run while a streaming response is read. Other requests
+    only pay for the sampling draw and a context variable lookup per traced
+    call. Django drops the middleware when the rate is 0.
+    """
+
+    def __init__(self, get_response):
+        """
+        Enable the middleware when configured.
+        """
+        if not settings.TRACING_SAMPLE_RATE:
+            raise MiddlewareNotUsed
+        self.get_response = get_response
+        self.sample_rate = settings.TRACING_SAMPLE_RATE
+
+    def __call__(self, request):
+        """
+        Handle the request, inside a trace when it is sampled.
+        """
+        if random.randrange(self.sample_rate):
+            return self.get_response(request)
+
+        trace = Trace(f"{request.method} {request.path}")
+        token = current_trace.set(trace)
+        try:
+            with ExitStack() as stack:
+                for connection in connections.all():
+                    stack.enter_context(connection.execute_wrapper(trace_sql))
+                response = self.get_response(request)
+        finally:
+            current_trace.reset(token)
+
+        def finish():
+            """
+            Name and save the trace once the response is complete.
+            """
+            trace.duration = (time.perf_counter() - trace.start) * 1000
+            if request.resolver_match:
+                trace.name = f"{trace.name} ({request.resolver_match.view_name})"
+            save_trace(trace)
+
+        if response.streaming:
+            response.streaming_content = stream_traced(
+                trace, response.streaming_content, finish
+            )
+        else:
+            finish()
+        return response
@@ -0,0 +1,39 @@
+"""
+    Module name :- urls
+"""
+
+from django.contrib import admin
+from django.urls import path
+from monitoring.views import (
+    DetailProfile,
+    DownloadProfile,
+    ListProfiles,
+    ListTraces,
+    metrics,
+)
+
+app_name = "monitoring"
+
+urlpatterns = [
+    path("metrics", metrics, name="metrics"),
+    path(
+        "admin/profiles/",
+        admin.site.admin_view(ListProfiles.as_view()),
+        name="profiles",
+    ),
+    path(
+        "admin/profiles/<str:name>/",
+        admin.site.admin_view(DetailProfile.as_view()),
+        name="profile",
+    ),
+    path(
+        "admin/profiles/<str:name>/download/",
+        admin.site.admin_view(DownloadProfile.as_view()),
+        name="download-profile",
+    ),
+    path(
+        "admin/traces/",
+        admin.site.admin_view(ListTraces.as_view()),
+        name="traces",
+    ),
+]
@@ -0,0 +1,136 @@
+"""
+    Module name :- views
+"""
+
+from django.conf import settings
+from django.contrib import admin
+from django.core.exceptions import PermissionDenied
+from django.http import FileResponse, Http404, HttpResponse
+from django.utils.crypto import constant_time_compare
+from django.views.generic import TemplateView, View
+from monitoring.metrics import get_metrics
+from monitoring.profiling import get_profile_path, get_profiles, get_stats
+from monitoring.tracing import get_span_stats, traces
+from prometheus_client import CONTENT_TYPE_LATEST
+
+
+def is_metrics_scraper(request):
+    """
+    Check whether a request comes from an allowed address or has the token.
+    """
+    if request.META.get("REMOTE_ADDR") in settings.METRICS_ALLOWED_IPS:
+        return True
+    authorization = request.headers.get("Authorization", "")
+    return bool(settings.METRICS_TOKEN) and constant_time_compare(
+        authorization, f"Bearer {settings.METRICS_TOKEN}"
+    )
+
+
+def metrics(request):
+    """
+    Metrics in Prometheus text format.
+    """
+    if not settings.METRICS:
+        raise Http404("Metrics are disabled.")
+    if not is_metrics_scraper(request):
+        raise PermissionDenied
+    return HttpResponse(get_metrics(), content_type=CONTENT_TYPE_LATEST)
+
+
+class ListProfiles(TemplateView):
+    """
+    List saved request profiles.
+    """
+
+    template_name = "monitoring/profiles.html"
+
+    def get_context_data(self, **kwargs):
+        """
+        Add admin context and profiles.
+        """
+        context = super().get_context_data(**kwargs)
+        context.update(admin.site.each_context(self.request))
+        context["title"] = "Request profiles"
+        context["profiles"] = get_profiles()
+        context["profiling"] = settings.PROFILING
+        context["profiling_dir"] = settings.PROFILING_DIR
+        return context
+
+
+class DetailProfile(TemplateView):
+    """
+    Show the slowest functions of a profile.
+    """
+
+    template_name = "monitoring/profile.html"
+
+    def get_context_data(self, **kwargs):
+        """
+        Add admin context and profile stats.
+        """
+        path = get_profile_path(self.kwargs["name"])
+        if path is None:
+            raise Http404("Profile not found.")
+
+        context = super().get_context_data(**kwargs)
+        context.update(admin.site.each_context(self.request))
+        context["title"] = path.name
+        context["stats"] = get_stats(path)
+        return context
+
+
+class DownloadProfile(View):
+    """
+    Download a profile for snakeviz, flameprof or other pstats viewers.
+    """
+
+    def get(self, request, *args, **kwargs):
+        """
+        Send the profile file.
+        """
+        path = get_profile_path(kwargs["name"])
+        if path is None:
+            raise Http404("Profile not found.")
+        return FileResponse(open(path, "rb"), as_attachment=True, filename=path.name)
+
+
+class ListTraces(TemplateView):
+    """
+    Show recent traces of this process as waterfalls.
+    """
+
+    template_name = "monitoring/traces.html"
+    limit = 50
+
+    def get_waterfall(self, trace):
+        """
+        Add bar offsets and widths as percentages of the trace duration.
+        """
+        duration = trace["duration"] or 1
+        return {
+            **trace,
+            "spans": [
+                {
+                    **span,
+                    "left": round(span["start"] / duration * 100, 2),
+                    "width": max(round(span["duration"] / duration * 100, 2), 0.2),
+                    "indent": span["depth"] * 12,
+                }
+                for span in trace["spans"]
+            ],
+        }
+
+    def get_context_data(self, **kwargs):
+        """
+        Add admin context, traces and span stats.
+        """
+        recent = list(traces)
+        context = super().get_context_data(**kwargs)
+        context.update(admin.site.each_context(self.request))
+        context["title"] = "Request traces"
+        context["sample_rate"] = settings.TRACING_SAMPLE_RATE
+        context["stats"] = get_span_stats(recent)
+        context["traces"] = [
+            self.get_waterfall(trace) for trace in reversed(recent[-self.limit :])
+        ]
+        return context
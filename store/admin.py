@@ -3,7 +3,10 @@
 """
 
 from django.contrib import admin
-from store.models import Equipment, EquipmentType, Allocation
+from django.db import transaction
+from store.models import Equipment, EquipmentType, Allocation, AllocationArchive
+from store.forms import AllocationAdminForm
+from store.transitions import change_status, update_allocation
 
 
 # Register your models here.
@@ -22,7 +25,68 @@ class EquipmentAdmin(admin.ModelAdmin):
     Equipment admin class.
     """
 
-    list_display = ["label", "equipment_type", "under_repair", "functional"]
+    list_display = [
+        "label",
+        "equipment_type",
+        "status",
+        "current_user",
+    ]
+    list_filter = ["status", "equipment_type"]
+    readonly_fields = ["status", "current_user"]
+    list_select_related = ["equipment_type", "current_user"]
+    actions = ["mark_under_repair", "mark_available", "mark_retired"]
+
+    def apply_status(self, request, queryset, status):
+        """
+        Change status of selected equipments and report the changed count.
+        """
+        count = change_status(queryset, status)
+        self.message_user(request, f"{count} equipments marked {status.label}.")
+
+    @admin.action(description="Mark selected equipments under repair")
+    def mark_under_repair(self, request, queryset):
+        """
+        Mark selected equipments under repair.
+        """
+        self.apply_status(request, queryset, Equipment.Status.UNDER_REPAIR)
+
+    @admin.action(description="Mark selected equipments back in service")
+    def mark_available(self, request, queryset):
+        """
+        Mark selected equipments available.
+        """
+        self.apply_status(request, queryset, Equipment.Status.AVAILABLE)
+
+    @admin.action(description="Mark selected equipments retired")
+    def mark_retired(self, request, queryset):
+        """
+        Mark selected equipments retired.
+        """
+        self.apply_status(request, queryset, Equipment.Status.RETIRED)
+
+    def save_model(self, request, obj, form, change):
+        """
+        Save equipment and bump versions of its old and new equipment type.
+        """
+        super().save_model(request, obj, form, change)
+        EquipmentType.bump_versions(
+            [form.initial.get("equipment_type"), obj.equipment_type_id]
+        )
+
+    def delete_model(self, request, obj):
+        """
+        Delete equipment and bump version of its equipment type.
+        """
+        super().delete_model(request, obj)
+        EquipmentType.bump_versions([obj.equipment_type_id])
+
+    def delete_queryset(self, request, queryset):
+        """
+        Delete equipments and bump versions of their equipment types.
+        """
+        equipment_type_ids = set(queryset.values_list("equipment_type", flat=True))
+        super().delete_queryset(request, queryset)
+        EquipmentType.bump_versions(equipment_type_ids)
 
 
 @admin.register(Allocation)
@@ -31,4 +95,56 @@ class AllocationAdmin(admin.ModelAdmin):
     Allocation admin class.
     """
 
-    list_display = ["user", "equipment", "returned"]
+    list_display = ["user", "equipment", "returned", "allocated_at", "returned_at"]
+    form = AllocationAdminForm
+
+    def save_model(self, request, obj, form, change):
+        """
+        Save allocation through the allocation transitions.
+        """
+        obj.pk = update_allocation(obj).pk
+
+    def delete_model(self, request, obj):
+        """
+        Delete allocation and update current user of equipment.
+        """
+        super().delete_model(request, obj)
+        obj.equipment.sync_current_user()
+
+    def delete_queryset(self, request, queryset):
+        """
+        Delete allocations and update current users of their equipments.
+        """
+        with transaction.atomic():
+            equipment_ids = set(queryset.values_list("equipment", flat=True))
+            super().delete_queryset(request, queryset)
+            for equipment in Equipment.objects.filter(pk__in=equipment_ids):
+                equipment.sync_current_user()
+
+
+@admin.register(AllocationArchive)
+class AllocationArchiveAdmin(admin.ModelAdmin):
+    """
+    Allocation archive admin class, read only.
+    """
+
+    list_display = ["user", "equipment", "allocated_at", "returned_at", "archived_at"]
+    list_select_related = ["user", "equipment"]
+
+    def has_add_permission(self, request):
+        """
+        Archived allocations are only added by archive_allocations.
+        """
+        return False
+
+    def has_change_permission(self, request, obj=None):
+        """
+        Archived allocations are append only.
+        """
+        return False
+
+    def has_delete_permission(self, request, obj=None):
+        """
+        Archived allocations are append only.
+        """
+        return False
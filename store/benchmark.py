@@ -0,0 +1,301 @@
+"""
+    Module name :- benchmark
+"""
+
+import json
+import statistics
+import time
+import tracemalloc
+
+from django.contrib.auth.models import User
+from django.db import connection, transaction
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from django.utils import timezone
+from store.models import Allocation, Equipment, EquipmentType
+
+SIZES = {"1k": 1_000, "100k": 100_000, "1m": 1_000_000}
+METRICS = ("p50_ms", "p95_ms", "queries", "peak_kb")
+
+
+def get_dataset_options(size):
+    """
+    Get utils command options for a dataset of ``size`` equipments.
+    """
+    items = SIZES[size]
+    return {
+        "users": max(items // 40, 10),
+        "equipment_types": 6,
+        "equipment": items,
+        "allocations": items * 5 // 2,
+    }
+
+
+def get_cases():
+    """
+    Get benchmark cases as (name, method, url, data) tuples.
+
+    Cases use the first equipment type and an allocated and an available
+    equipment of it, so the dataset must have been seeded first. POST cases
+    are rolled back after every request.
+    """
+    equipment_type = EquipmentType.objects.order_by("pk").first()
+    equipments = Equipment.objects.filter(equipment_type=equipment_type)
+    allocated = equipments.filter(status=Equipment.Status.ALLOCATED).first()
+    available = equipments.filter(status=Equipment.Status.AVAILABLE).first()
+    allocation = Allocation.get_non_returned_allocations().first()
+    user = User.objects.filter(is_superuser=False).order_by("pk").first()
+    type_name = equipment_type.name
+
+    cases = [
+        ("store:equipment-types", "get", reverse("store:equipment-types"), None),
+        ("store:add-equipment-type", "get", reverse("store:add-equipment-type"), None),
+        (
+            "store:delete-equipment-type",
+            "get",
+            reverse("store:delete-equipment-type", args=[equipment_type.pk]),
+            None,
+        ),
+        ("store:add-equipment", "get", reverse("store:add-equipment"), None),
+        (
+            "store:update-equipment",
+            "get",
+            reverse("store:update-equipment", args=[type_name, allocated.pk]),
+            None,
+        ),
+        (
+            "store:delete-equipment",
+            "get",
+            reverse("store:delete-equipment", args=[type_name, allocated.pk]),
+            None,
+        ),
+        (
+            "store:detail-equipment",
+            "get",
+            reverse("store:detail-equipment", args=[type_name, allocated.pk]),
+            None,
+        ),
+        (
+            "store:equipment-history",
+            "get",
+            reverse("store:equipment-history", args=[allocated.pk]),
+            None,
+        ),
+    ]
+
+    for filtering in ("working", "assigned", "under_repair"):
+        cases.append(
+            (
+                f"store:particular-equipments[{filtering}]",
+                "get",
+                reverse("store:particular-equipments", args=[type_name, filtering]),
+                None,
+            )
+        )
+
+    cases += [
+        (
+            "store:export-equipments",
+            "get",
+            reverse("store:export-equipments", args=[type_name, "working", "csv"]),
+            None,
+        ),
+        (
+            "store:bulk-equipment-status",
+            "post",
+            reverse("store:bulk-equipment-status", args=[type_name, "working"]),
+            {"equipments": [available.pk], "status": Equipment.Status.UNDER_REPAIR},
+        ),
+        (
+            "store:create-allocation[get]",
+            "get",
+            reverse("store:create-allocation"),
+            None,
+        ),
+        (
+            "store:create-allocation[post]",
+            "post",
+            reverse("store:create-allocation"),
+            {
+                "equipment_type": equipment_type.pk,
+                "equipment": available.pk,
+                "user": user.pk,
+            },
+        ),
+        (
+            "store:update-allocation",
+            "get",
+            reverse("store:update-allocation", args=[allocation.pk]),
+            None,
+        ),
+        (
+            "store:delete-allocation",
+            "get",
+            reverse("store:delete-allocation", args=[allocation.pk]),
+            None,
+        ),
+        ("store:allocations", "get", reverse("store:allocations"), None),
+        (
+            "store:bulk-allocation",
+            "post",
+            reverse("store:bulk-allocation"),
+            json.dumps(
+                {
+                    "operations": [
+                        {
+                            "action": "allocate",
+                            "label": available.label,
+                            "user": user.username,
+                        },
+                        {"action": "return", "label": allocated.label},
+                    ]
+                }
+            ),
+        ),
+        (
+            "store:allocations-at",
+            "get",
+            reverse("store:allocations-at"),
+            {"at": timezone.localtime().strftime("%Y-%m-%dT%H:%M")},
+        ),
+        (
+            "store:export-allocations",
+            "get",
+            reverse("store:export-allocations", args=["csv"]),
+            None,
+        ),
+        (
+            "store:search-equipment",
+            "get",
+            reverse("store:search-equipment", args=[type_name]),
+            {"search": available.label[:4]},
+        ),
+        (
+            "store:search-equipment-type",
+            "get",
+            reverse("store:search-equipment-type"),
+            {"search": type_name[:3]},
+        ),
+        (
+            "store:search-allocation",
+            "get",
+            reverse("store:search-allocation"),
+            {"search": user.username[:4]},
+        ),
+        (
+            "store:get_ids",
+            "get",
+            reverse("store:get_ids"),
+            {"equipment_type": equipment_type.pk},
+        ),
+        (
+            "store:get_label",
+            "get",
+            reverse("store:get_label"),
+            {"equipment_type": equipment_type.pk},
+        ),
+        ("accounts:login", "get", reverse("accounts:login"), None),
+        ("accounts:users", "get", reverse("accounts:users"), None),
+        ("accounts:add-user", "get", reverse("accounts:add-user"), None),
+        (
+            "accounts:update-user",
+            "get",
+            reverse("accounts:update-user", args=[user.pk]),
+            None,
+        ),
+        (
+            "accounts:delete-user",
+            "get",
+            reverse("accounts:delete-user", args=[user.pk]),
+            None,
+        ),
+        (
+            "accounts:search-user",
+            "get",
+            reverse("accounts:search-user"),
+            {"search": user.username[:4]},
+        ),
+    ]
+    return cases
+
+
+def request(client, method, url, data):
+    """
+    Make a request and read the whole response body.
+
+    POST requests run in a transaction that is rolled back, so every
+    repetition sees the same data.
+    """
+    if method == "get":
+        response = client.get(url, data)
+        if response.streaming:
+            b"".join(response.streaming_content)
+        return response
+
+    with transaction.atomic():
+        if isinstance(data, str):
+            response = client.post(url, data, content_type="application/json")
+        else:
+            response = client.post(url, data)
+        transaction.set_rollback(True)
+    return response
+
+
+def measure(client, method, url, data, repeat, warmup):
+    """
+    Measure latency percentiles, query count and peak memory of a request.
+
+    Latencies come from ``repeat`` plain runs. Queries and peak memory come
+    from one more run, since tracing memory slows requests down.
+    """
+    for _ in range(warmup):
+        request(client, method, url, data)
+
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        request(client, method, url, data)
+        timings.append((time.perf_counter() - start) * 1000)
+
+    tracemalloc.start()
+    try:
+        with CaptureQueriesContext(connection) as queries:
+            response = request(client, method, url, data)
+        peak = tracemalloc.get_traced_memory()[1]
+    finally:
+        tracemalloc.stop()
+
+    return {
+        "status": response.status_code,
+        "p50_ms": round(statistics.median(timings), 3),
+        "p95_ms": round(statistics.quantiles(timings, n=20, method="inclusive")[18], 3),
+        "queries": len(queries),
+        "peak_kb": round(peak / 1024, 1),
+    }
+
+
+def compare(results, baseline, threshold):
+    """
+    Compare results against a baseline.
+
+    Returns (size, case, metric, baseline value, value) tuples of the
+    metrics that got worse by more than ``threshold`` (a fraction). Query
+    counts must not grow at all.
+    """
+    regressions = []
+    for size, cases in results.items():
+        for name, result in cases.items():
+            previous = baseline.get(size, {}).get(name)
+            if previous is None:
+                continue
+            for metric in METRICS:
+                if metric not in previous:
+                    continue
+                limit = previous[metric]
+                if metric != "queries":
+                    limit *= 1 + threshold
+                if result[metric] > limit:
+                    regressions.append(
+                        (size, name, metric, previous[metric], result[metric])
+                    )
+    return regressions
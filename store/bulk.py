@@ -0,0 +1,131 @@
+"""
+    Module name :- bulk
+"""
+
+from django.contrib.auth.models import User
+from django.db import transaction
+from django.utils import timezone
+from monitoring.metrics import record_allocations
+from store.models import Allocation, Equipment, EquipmentType
+
+ACTIONS = ("allocate", "return", "transfer")
+
+
+def apply_allocation_operations(operations):
+    """
+    Allocate, return and transfer equipments in one transaction.
+
+    Every operation is a dict with an ``action`` (allocate, return or
+    transfer), the equipment ``label`` and, except for returns, the target
+    ``user`` name. Operations are applied in order and the result of each is
+    returned; failed operations do not stop the others.
+    """
+    results = []
+    for index, operation in enumerate(operations):
+        if not isinstance(operation, dict):
+            operation = {}
+        result = {"index": index, "status": "ok"}
+        for key in ("action", "label", "user"):
+            value = operation.get(key)
+            result[key] = str(value) if value is not None else None
+        results.append(result)
+
+    with transaction.atomic():
+        equipments = {
+            equipment.label: equipment
+            for equipment in Equipment.objects.select_for_update()
+            .filter(label__in={result["label"] for result in results})
+            .only(
+                "pk",
+                "label",
+                "equipment_type",
+                "status",
+                "current_user",
+            )
+        }
+        users = {
+            user.username: user
+            for user in User.objects.filter(
+                username__in={result["user"] for result in results}
+            ).only("pk", "username")
+        }
+
+        now = timezone.now()
+        holders = {
+            equipment.pk: equipment.current_user_id for equipment in equipments.values()
+        }
+        new_allocations = {}
+        closed_equipments = set()
+
+        for result in results:
+            equipment = equipments.get(result["label"])
+            user = users.get(result["user"])
+            action = result["action"]
+
+            if action not in ACTIONS:
+                error = "Unknown action."
+            elif equipment is None:
+                error = "Unknown equipment."
+            elif action != "return" and user is None:
+                error = "Unknown user."
+            elif action == "allocate" and holders[equipment.pk] is not None:
+                error = "Equipment is already allocated."
+            elif action == "allocate" and equipment.status not in Equipment.IN_SERVICE:
+                error = "Equipment is not available."
+            elif action != "allocate" and holders[equipment.pk] is None:
+                error = "Equipment is not allocated."
+            elif action == "transfer" and holders[equipment.pk] == user.pk:
+                error = "Equipment is already allocated to this user."
+            else:
+                error = None
+
+            if error:
+                result.update(status="error", error=error)
+                continue
+
+            if action != "allocate":
+                if equipment.pk in new_allocations:
+                    new_allocations[equipment.pk][-1].returned = True
+                    new_allocations[equipment.pk][-1].returned_at = now
+                else:
+                    closed_equipments.add(equipment.pk)
+                holders[equipment.pk] = None
+
+            if action != "return":
+                new_allocations.setdefault(equipment.pk, []).append(
+                    Allocation(equipment=equipment, user=user, allocated_at=now)
+                )
+                holders[equipment.pk] = user.pk
+
+        returned = Allocation.objects.filter(
+            equipment__in=closed_equipments, returned=False
+        ).update(returned=True, returned_at=now)
+        created = Allocation.objects.bulk_create(
+            [
+                allocation
+                for allocations in new_allocations.values()
+                for allocation in allocations
+            ]
+        )
+        record_allocations(
+            created=len(created),
+            returned=returned + sum(allocation.returned for allocation in created),
+        )
+
+        changed_equipments = [
+            equipment
+            for equipment in equipments.values()
+            if equipment.current_user_id != holders[equipment.pk]
+        ]
+        for equipment in changed_equipments:
+            equipment.current_user_id = holders[equipment.pk]
+            equipment.status = Equipment.get_holder_status(
+                equipment.status, equipment.current_user_id
+            )
+        Equipment.objects.bulk_update(changed_equipments, ["current_user", "status"])
+
+        EquipmentType.bump_versions(
+            equipment.equipment_type_id for equipment in changed_equipments
+        )
+
+    return results
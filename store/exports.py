@@ -0,0 +1,64 @@
+"""
+    Module name :- exports
+"""
+
+import csv
+import json
+
+from django.core.serializers.json import DjangoJSONEncoder
+from django.http import Http404, StreamingHttpResponse
+
+EXPORT_FORMATS = {
+    "csv": "text/csv",
+    "jsonl": "application/x-ndjson",
+}
+
+
+class Echo:
+    """
+    File-like object returning what is written to it.
+    """
+
+    def write(self, value):
+        """
+        Return written value.
+        """
+        return value
+
+
+def stream_csv(header, rows):
+    """
+    Yield CSV lines.
+    """
+    writer = csv.writer(Echo())
+    yield writer.writerow(header)
+    for row in rows:
+        yield writer.writerow(row)
+
+
+def stream_jsonl(header, rows):
+    """
+    Yield JSON lines.
+    """
+    encoder = DjangoJSONEncoder()
+    for row in rows:
+        yield encoder.encode(dict(zip(header, row))) + "\n"
+
+
+def export_response(queryset, header, fields, filename, export_format):
+    """
+    Stream a queryset as a CSV or JSONL file.
+    """
+    if export_format not in EXPORT_FORMATS:
+        raise Http404("Unknown export format.")
+
+    rows = queryset.values_list(*fields).iterator(chunk_size=2000)
+    stream = stream_csv if export_format == "csv" else stream_jsonl
+
+    response = StreamingHttpResponse(
+        stream(header, rows), content_type=EXPORT_FORMATS[export_format]
+    )
+    response["Content-Disposition"] = (
+        f'attachment; filename="{filename}.{export_format}"'
+    )
+    return response
@@ -4,7 +4,10 @@
 
 from django import forms
 from django.contrib.auth.models import User
+from django.db import transaction
+from monitoring.tracing import traced
 from store.models import Equipment, EquipmentType, Allocation
+from store.transitions import change_status, is_reallocation
 
 
 class EquipmentTypeForm(forms.ModelForm):
@@ -67,15 +70,19 @@ class AddEquipmentForm(EquipmentForm):
     Form for equipment
     """
 
+    @traced
     def save(self, commit=True):
         """
         Overriding save().
         """
         instance = super().save(commit=False)
-        instance.label = instance.set_label
 
-        if commit:
-            instance.save()
+        with transaction.atomic():
+            instance.set_label()
+
+            if commit:
+                instance.save()
+                EquipmentType.bump_versions([instance.equipment_type_id])
         return instance
 
 
@@ -84,12 +91,15 @@ class UpdateEquipmentForm(EquipmentForm):
     Update form for equipment.
     """
 
+    status = forms.ChoiceField(choices=Equipment.Status.choices)
+    status.widget.attrs.update({"class": "form-select"})
+
     class Meta(EquipmentForm.Meta):
         """
         Meta class for Update Equipment Form.
         """
 
-        fields = ("label",) + EquipmentForm.Meta.fields + ("under_repair", "functional")
+        fields = ("label",) + EquipmentForm.Meta.fields
 
         widgets = {
             "label": forms.TextInput(
@@ -104,25 +114,77 @@ class UpdateEquipmentForm(EquipmentForm):
             "brand": forms.TextInput(attrs={"class": "form-control"}),
         }
 
+    def __init__(self, *args, **kwargs):
+        """
+        Initializer.
+        """
+        super().__init__(*args, **kwargs)
+        self.fields["status"].initial = self.instance.status
+
+    def clean_status(self):
+        """
+        Allocations are the only way to allocate equipments.
+        """
+        status = self.cleaned_data["status"]
+        if status == Equipment.Status.ALLOCATED and self.instance.status != status:
+            raise forms.ValidationError("Allocate equipments from allocations.")
+        return status
+
+    @traced
     def save(self, commit=True):
         """
         Save Method.
         """
         instance = super().save(commit=False)
-        if instance.under_repair is True or instance.functional is False:
-            equipment = Equipment.objects.get(pk=instance.pk)
-            allocations = Allocation.objects.filter(equipment=equipment)[::-1]
-
-            if allocations:
-                last_allocation = allocations[0]
-                last_allocation.returned = True
-                last_allocation.save()
 
         if commit:
-            instance.save()
+            with transaction.atomic():
+                instance.save(update_fields=self._meta.fields)
+
+                status = self.cleaned_data["status"]
+                if status != instance.status and change_status([instance.pk], status):
+                    instance.status = status
+                    instance.current_user = None
+
+                EquipmentType.bump_versions(
+                    [self.initial["equipment_type"], instance.equipment_type_id]
+                )
         return instance
 
 
+class BulkStatusForm(forms.Form):
+    """
+    Form to change the status of several equipments.
+    """
+
+    equipments = forms.ModelMultipleChoiceField(queryset=Equipment.objects.none())
+    status = forms.ChoiceField(
+        choices=[
+            (Equipment.Status.UNDER_REPAIR, "Mark under repair"),
+            (Equipment.Status.AVAILABLE, "Mark back in service"),
+            (Equipment.Status.RETIRED, "Mark retired"),
+        ]
+    )
+
+    def __init__(self, *args, equipment_type=None, **kwargs):
+        """
+        Initializer.
+        """
+        super().__init__(*args, **kwargs)
+        self.fields["equipments"].queryset = Equipment.objects.filter(
+            equipment_type=equipment_type
+        ).only("pk")
+
+    @traced
+    def save(self):
+        """
+        Change the status of the selected equipments.
+        """
+        return change_status(
+            self.cleaned_data["equipments"], self.cleaned_data["status"]
+        )
+
+
 class AllocationForm(forms.ModelForm):
     """
     Allocation Form.
@@ -156,7 +218,39 @@ class CreateAllocationForm(AllocationForm):
     equipment_type.widget.attrs.update({"class": "form-select"})
 
 
-class UpdateAllocationForm(AllocationForm):
+class AllocationEditMixin:
+    """
+    Form mixin refusing to open allocations of unavailable equipments.
+    """
+
+    def clean(self):
+        """
+        Check the target equipment when the edit opens or moves an allocation.
+        """
+        cleaned_data = super().clean()
+        equipment = cleaned_data.get("equipment")
+        user = cleaned_data.get("user")
+        stored = self.instance if self.instance.pk else None
+
+        if (
+            equipment
+            and user
+            and is_reallocation(
+                stored, equipment.pk, user.pk, cleaned_data.get("returned", False)
+            )
+        ):
+            # Closing the stored open allocation frees its own equipment.
+            freed = (
+                stored is not None
+                and not stored.returned
+                and stored.equipment_id == equipment.pk
+            )
+            if equipment.status != Equipment.Status.AVAILABLE and not freed:
+                self.add_error("equipment", "Equipment is not available.")
+        return cleaned_data
+
+
+class UpdateAllocationForm(AllocationEditMixin, AllocationForm):
     """
     Update Allocation Form.
     """
@@ -167,3 +261,35 @@ class UpdateAllocationForm(AllocationForm):
         """
 
         fields = AllocationForm.Meta.fields + ("returned",)
+
+
+class PointInTimeForm(forms.Form):
+    """
+    Form to look up allocations at a moment.
+    """
+
+    at = forms.DateTimeField(
+        widget=forms.DateTimeInput(
+            attrs={"class": "form-control", "type": "datetime-local"}
+        )
+    )
+    label = forms.CharField(
+        required=False,
+        widget=forms.TextInput(
+            attrs={"class": "form-control", "placeholder": "Equipment label"}
+        ),
+    )
+
+
+class AllocationAdminForm(AllocationEditMixin, forms.ModelForm):
+    """
+    Admin form of allocations.
+    """
+
+    class Meta:
+        """
+        Meta class for Allocation Admin Form.
+        """
+
+        model = Allocation
+        fields = "__all__"
@@ -0,0 +1,142 @@
+"""
+    Module name :- generator
+"""
+
+import random
+from collections import Counter
+from datetime import datetime, time, timedelta
+
+FIRST_NAMES = [
+    "John",
+    "Micheal",
+    "David",
+    "Maria",
+    "Stephen",
+    "Priya",
+    "Arjun",
+    "Sara",
+    "Wei",
+    "Fatima",
+]
+LAST_NAMES = [
+    "Watson",
+    "Pointing",
+    "Dsouza",
+    "Beckham",
+    "Stark",
+    "Sharma",
+    "Khan",
+    "Chen",
+    "Garcia",
+    "Okafor",
+]
+EQUIPMENT_TYPES = ["Laptop", "Monitor", "Keyboard", "Mouse", "Speaker", "CPU"]
+BRANDS = ["Samsung", "Nokia", "Microsoft", "Apple", "Logitech", "Dell"]
+STATUSES = ["available", "under_repair", "retired"]
+STATUS_WEIGHTS = [85, 10, 5]
+MAX_AGE_DAYS = 5 * 365
+
+
+def get_random(seed, kind, chunk):
+    """
+    Get a random generator for one chunk, independent of the worker running it.
+    """
+    return random.Random(f"{seed}:{kind}:{chunk}")
+
+
+def get_equipment_type_name(index):
+    """
+    Get name of the nth equipment type.
+
+    Labels start with the first three letters of the type name, so extra
+    types get a numeric prefix to spread their labels over prefixes.
+    """
+    if index < len(EQUIPMENT_TYPES):
+        return EQUIPMENT_TYPES[index]
+    return f"{index:03d} Equipment"
+
+
+def build_users(seed, chunk, start_id, count):
+    """
+    Build user rows of (id, username, first_name, last_name, email).
+    """
+    rng = get_random(seed, "users", chunk)
+    rows = []
+
+    for user_id in range(start_id, start_id + count):
+        first_name = rng.choice(FIRST_NAMES)
+        last_name = rng.choice(LAST_NAMES)
+        username = f"{first_name}.{last_name}.{user_id}".lower()
+        rows.append(
+            (user_id, username, first_name, last_name, f"{username}@example.com")
+        )
+
+    return rows
+
+
+def build_equipments(
+    seed, chunk, start_id, count, allocation_count, type_ids, user_ids, open_chance, now
+):
+    """
+    Build equipment rows and their allocation histories.
+
+    Equipment rows are (id, equipment_type_id, serial_number, model_number,
+    brand, price, buy_date, status, current_user_id) and allocation rows
+    are (equipment_id, user_id, returned, allocated_at, returned_at), each
+    equipment's allocations in time order. Allocations of an equipment do
+    not overlap and only the last one can be open, with a chance of
+    ``open_chance`` for available equipments.
+    """
+    rng = get_random(seed, "equipments", chunk)
+    histories = Counter(rng.choices(range(count), k=allocation_count))
+    equipment_rows = []
+    allocation_rows = []
+
+    for index, equipment_id in enumerate(range(start_id, start_id + count)):
+        brand = rng.choice(BRANDS)
+        buy_date = now.date() - timedelta(days=rng.randrange(MAX_AGE_DAYS))
+        status = rng.choices(STATUSES, STATUS_WEIGHTS)[0]
+        current_user_id = None
+
+        allocations = histories[index]
+        if allocations and user_ids:
+            start = datetime.combine(buy_date, time.min, tzinfo=now.tzinfo)
+            span = (now - start).total_seconds()
+            moments = sorted(
+                start + timedelta(seconds=rng.uniform(0, span))
+                for _ in range(2 * allocations)
+            )
+            is_open = status == "available" and rng.random() < open_chance
+
+            for number in range(allocations):
+                user_id = rng.choice(user_ids)
+                returned = not (is_open and number == allocations - 1)
+                allocation_rows.append(
+                    (
+                        equipment_id,
+                        user_id,
+                        returned,
+                        moments[2 * number],
+                        moments[2 * number + 1] if returned else None,
+                    )
+                )
+
+            if is_open:
+                status = "allocated"
+                current_user_id = user_id
+
+        equipment_rows.append(
+            (
+                equipment_id,
+                rng.choice(type_ids),
+                f"SN{rng.randrange(10**9):09d}",
+                f"{brand[:3].upper()}-{rng.randrange(1000, 10000)}",
+                brand,
+                rng.randrange(1000, 100000),
+                buy_date,
+                status,
+                current_user_id,
+            )
+        )
+
+    return equipment_rows, allocation_rows
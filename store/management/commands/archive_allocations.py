@@ -0,0 +1,67 @@
+"""
+    Move old returned allocations to the archive table.
+"""
+
+from datetime import datetime, time, timedelta
+
+from django.core.management.base import BaseCommand, CommandError
+from django.utils import timezone
+from django.utils.dateparse import parse_date, parse_datetime
+from store.models import AllocationArchive
+
+
+class Command(BaseCommand):
+    """
+    Command class to archive returned allocations.
+    """
+
+    help = (
+        "Move allocations returned before a cutoff from the allocation table "
+        "to the archive table in batched transactions."
+    )
+
+    def add_arguments(self, parser):
+        """
+        Add command arguments.
+        """
+        parser.add_argument(
+            "--days",
+            type=int,
+            default=365,
+            help="Archive allocations returned more than this many days ago.",
+        )
+        parser.add_argument(
+            "--before", help="Archive allocations returned before this date."
+        )
+        parser.add_argument("--batch-size", type=int, default=1000)
+
+    def get_cutoff(self, options):
+        """
+        Get the cutoff moment.
+        """
+        if not options["before"]:
+            return timezone.now() - timedelta(days=options["days"])
+
+        cutoff = parse_datetime(options["before"])
+        if cutoff is None:
+            day = parse_date(options["before"])
+            if day is None:
+                raise CommandError(f"Invalid date {options['before']!r}.")
+            cutoff = datetime.combine(day, time.min)
+
+        if timezone.is_naive(cutoff):
+            cutoff = timezone.make_aware(cutoff)
+        return cutoff
+
+    def handle(self, *args, **options):
+        """
+        Overriding handle().
+        """
+        cutoff = self.get_cutoff(options)
+        archived = AllocationArchive.archive(cutoff, batch_size=options["batch_size"])
+
+        self.stdout.write(
+            self.style.SUCCESS(
+                f"Archived {archived} allocations returned before {cutoff}."
+            )
+        )
@@ -0,0 +1,149 @@
+"""
+    Benchmark store and accounts views on seeded datasets.
+"""
+
+import json
+import platform
+import re
+from io import StringIO
+
+import django
+from django.contrib.auth.models import User
+from django.core.management import call_command
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+from django.test import Client
+from django.test.utils import setup_test_environment, teardown_test_environment
+from django.utils import timezone
+from store.benchmark import SIZES, compare, get_cases, get_dataset_options, measure
+
+
+class Command(BaseCommand):
+    """
+    Command class to benchmark views.
+    """
+
+    help = (
+        "Seed a test database for every dataset size, time every store and "
+        "accounts view through the test client and write p50/p95 latency, "
+        "query count and peak memory as JSON. The configured database is not "
+        "touched. With --baseline the results are compared and the command "
+        "fails on regressions."
+    )
+
+    def add_arguments(self, parser):
+        """
+        Add command arguments.
+        """
+        parser.add_argument(
+            "--sizes",
+            nargs="+",
+            choices=list(SIZES),
+            default=["1k"],
+            help="Dataset sizes in equipments.",
+        )
+        parser.add_argument("--repeat", type=int, default=20)
+        parser.add_argument("--warmup", type=int, default=2)
+        parser.add_argument("--seed", type=int, default=0)
+        parser.add_argument(
+            "--workers", type=int, default=None, help="Workers seeding datasets."
+        )
+        parser.add_argument(
+            "--case", help="Only run cases whose name matches this regex."
+        )
+        parser.add_argument("--output", default="benchmark.json")
+        parser.add_argument("--baseline", help="JSON results to compare against.")
+        parser.add_argument(
+            "--threshold",
+            type=float,
+            default=0.2,
+            help="Allowed slowdown and memory growth as a fraction.",
+        )
+
+    def run_size(self, size, options):
+        """
+        Seed a dataset and benchmark every case on it.
+        """
+        seed_options = {"seed": options["seed"], "verbosity": 0}
+        if options["workers"]:
+            seed_options["workers"] = options["workers"]
+        call_command(
+            "utils", **get_dataset_options(size), **seed_options, stdout=StringIO()
+        )
+
+        client = Client()
+        client.force_login(
+            User.objects.create_superuser("benchmark", password="benchmark")
+        )
+
+        results = {}
+        for name, method, url, data in get_cases():
+            if options["case"] and not re.search(options["case"], name):
+                continue
+
+            result = measure(
+                client, method, url, data, options["repeat"], options["warmup"]
+            )
+            results[name] = result
+            self.stdout.write(
+                f"{size:>5} {name:<40} {result['status']} "
+                f"p50 {result['p50_ms']:>9.2f}ms p95 {result['p95_ms']:>9.2f}ms "
+                f"{result['queries']:>4} queries {result['peak_kb']:>10.1f}KB"
+            )
+        return results
+
+    def handle(self, *args, **options):
+        """
+        Overriding handle().
+        """
+        if options["repeat"] < 2:
+            raise CommandError("Repeat at least twice to get percentiles.")
+
+        baseline = None
+        if options["baseline"]:
+            try:
+                with open(options["baseline"], encoding="utf-8") as file:
+                    baseline = json.load(file)["results"]
+            except (OSError, ValueError, KeyError) as error:
+                raise CommandError(f"Cannot read baseline: {error}") from error
+
+        results = {}
+        setup_test_environment()
+        try:
+            for size in options["sizes"]:
+                old_name = connection.creation.create_test_db(
+                    verbosity=0, autoclobber=True, serialize=False
+                )
+                try:
+                    results[size] = self.run_size(size, options)
+                finally:
+                    connection.creation.destroy_test_db(old_name, verbosity=0)
+        finally:
+            teardown_test_environment()
+
+        with open(options["output"], "w", encoding="utf-8") as file:
+            json.dump(
+                {
+                    "created": timezone.now().isoformat(),
+                    "database": connection.vendor,
+                    "django": django.get_version(),
+                    "python": platform.python_version(),
+                    "repeat": options["repeat"],
+                    "results": results,
+                },
+                file,
+                indent=2,
+            )
+        self.stdout.write(f"Results written to {options['output']}.")
+
+        if baseline is None:
+            return
+
+        regressions = compare(results, baseline, options["threshold"])
+        for size, name, metric, previous, current in regressions:
+            self.stdout.write(
+                self.style.ERROR(f"{size} {name} {metric}: {previous} -> {current}")
+            )
+        if regressions:
+            raise CommandError(f"{len(regressions)} regressions against baseline.")
+        self.stdout.write(self.style.SUCCESS("No regressions against baseline."))
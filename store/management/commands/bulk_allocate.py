@@ -0,0 +1,61 @@
+"""
+    Allocate, return and transfer equipments in bulk.
+"""
+
+import csv
+import json
+from pathlib import Path
+
+from django.core.management.base import BaseCommand, CommandError
+from store.bulk import apply_allocation_operations
+
+
+class Command(BaseCommand):
+    """
+    Command class to allocate, return and transfer equipments in bulk.
+    """
+
+    help = (
+        "Apply allocation operations from a CSV or JSONL file with the columns "
+        "action (allocate, return or transfer), label and user, in a single "
+        "transaction. Prints the result of every operation as JSON lines."
+    )
+
+    def add_arguments(self, parser):
+        """
+        Add command arguments.
+        """
+        parser.add_argument("file")
+        parser.add_argument("--format", choices=["csv", "jsonl"])
+
+    def handle(self, *args, **options):
+        """
+        Overriding handle().
+        """
+        path = Path(options["file"])
+        if not path.exists():
+            raise CommandError(f"{path} does not exist.")
+
+        file_format = options["format"] or (
+            "jsonl" if path.suffix in (".jsonl", ".json") else "csv"
+        )
+
+        with open(path, newline="", encoding="utf-8") as file:
+            if file_format == "csv":
+                operations = list(csv.DictReader(file))
+            else:
+                try:
+                    operations = [json.loads(line) for line in file if line.strip()]
+                except ValueError as error:
+                    raise CommandError(f"Invalid JSON line: {error}") from error
+
+        results = apply_allocation_operations(operations)
+        for result in results:
+            self.stdout.write(json.dumps(result))
+
+        failed = sum(result["status"] == "error" for result in results)
+        self.stdout.write(
+            self.style.SUCCESS(
+                f"Applied {len(results) - failed} operations, {failed} failed."
+            )
+        )
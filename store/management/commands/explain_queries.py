@@ -0,0 +1,103 @@
+"""
+    Print query plans of the hot store queries.
+"""
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection, transaction
+from store.models import Equipment, EquipmentType, Allocation
+
+
+class Command(BaseCommand):
+    """
+    Command class to print query plans of the hot store queries.
+    """
+
+    help = (
+        "Print query plans of the hot store queries. With --compare the plans "
+        "are printed without the store indexes first; the indexes are dropped "
+        "inside a transaction that is rolled back, which locks the tables on "
+        "PostgreSQL, so do not compare against a busy database."
+    )
+
+    def add_arguments(self, parser):
+        """
+        Add command arguments.
+        """
+        parser.add_argument("--equipment-type", help="Equipment type name to use.")
+        parser.add_argument(
+            "--compare",
+            action="store_true",
+            help="Also print the plans without the store indexes.",
+        )
+
+    def get_queries(self, equipment_type):
+        """
+        Get hot queries.
+        """
+        equipment = Equipment.objects.filter(equipment_type=equipment_type).first()
+
+        return {
+            "Equipment type by name": EquipmentType.objects.filter(
+                name=equipment_type.name
+            ),
+            "Working equipments": Equipment.get_all_functional_equipments(
+                equipment_type
+            ),
+            "Available equipments": Equipment.get_non_assigned_equipments(
+                equipment_type
+            ),
+            "Assigned equipments": Equipment.get_assigned_equipments(equipment_type),
+            "Under repair equipments": Equipment.get_under_repair_equipments(
+                equipment_type
+            ),
+            "Equipment by label": Equipment.objects.filter(
+                label=equipment.label if equipment else ""
+            ),
+            "Open allocations": Allocation.get_non_returned_allocations(),
+            "Open allocation of equipment": Allocation.objects.filter(
+                equipment=equipment, returned=False
+            ),
+        }
+
+    def write_plans(self, queries):
+        """
+        Write query plans.
+        """
+        for title, queryset in queries.items():
+            self.stdout.write(self.style.MIGRATE_HEADING(title))
+            self.stdout.write(queryset.explain())
+            self.stdout.write("")
+
+    def handle(self, *args, **options):
+        """
+        Overriding handle().
+        """
+        if options["equipment_type"]:
+            equipment_type = EquipmentType.objects.filter(
+                name=options["equipment_type"]
+            ).first()
+        else:
+            equipment_type = EquipmentType.objects.first()
+
+        if equipment_type is None:
+            raise CommandError("No equipment type found.")
+
+        queries = self.get_queries(equipment_type)
+        self.stdout.write(f"Database vendor: {connection.vendor}\n")
+
+        if options["compare"]:
+            self.stdout.write(self.style.WARNING("Without indexes\n"))
+
+            with transaction.atomic():
+                with connection.cursor() as cursor:
+                    for model in (Equipment, Allocation):
+                        for index in model._meta.indexes:
+                            cursor.execute(
+                                f"DROP INDEX {connection.ops.quote_name(index.name)}"
+                            )
+                self.write_plans(queries)
+                transaction.set_rollback(True)
+
+            self.stdout.write(self.style.WARNING("With indexes\n"))
+
+        self.write_plans(queries)
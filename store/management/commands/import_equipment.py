@@ -0,0 +1,231 @@
+"""
+    Import equipments from a CSV or JSONL file.
+"""
+
+import csv
+import json
+from collections import defaultdict
+from pathlib import Path
+
+from django.core.exceptions import ValidationError
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+from store.models import Equipment, EquipmentType
+
+FIELDS = ("serial_number", "model_number", "brand", "price", "buy_date")
+OPTIONAL_FIELDS = ("status",)
+
+
+def read_rows(path, file_format):
+    """
+    Yield parsed and raw rows of the file, one at a time.
+    """
+    with open(path, newline="", encoding="utf-8") as file:
+        if file_format == "csv":
+            for row in csv.DictReader(file):
+                yield row, row
+        else:
+            for line in file:
+                if not line.strip():
+                    continue
+                try:
+                    row = json.loads(line)
+                except ValueError:
+                    yield None, line.rstrip("\n")
+                    continue
+                yield row if isinstance(row, dict) else None, line.rstrip("\n")
+
+
+class Command(BaseCommand):
+    """
+    Command class to import equipments.
+    """
+
+    help = (
+        "Import equipments from a CSV or JSONL file with the columns "
+        "equipment_type, serial_number, model_number, brand, price, buy_date "
+        "and optionally status (available, under_repair or retired), which only "
+        "applies to new equipments. Labels are assigned automatically."
+    )
+
+    def add_arguments(self, parser):
+        """
+        Add command arguments.
+        """
+        parser.add_argument("file")
+        parser.add_argument("--format", choices=["csv", "jsonl"])
+        parser.add_argument("--batch-size", type=int, default=1000)
+        parser.add_argument(
+            "--upsert",
+            action="store_true",
+            help="Update equipments with the same serial number instead of "
+            "creating new ones. The last row of a serial number wins.",
+        )
+        parser.add_argument(
+            "--create-types",
+            action="store_true",
+            help="Create missing equipment types instead of rejecting rows.",
+        )
+        parser.add_argument(
+            "--reject-file", help="CSV file to write rejected rows and errors to."
+        )
+
+    def build_equipment(self, row):
+        """
+        Build an unsaved equipment from a row.
+        """
+        if row is None:
+            raise ValidationError("Invalid row.")
+
+        name = str(row.get("equipment_type") or "").strip()
+        equipment_type = self.equipment_types.get(name)
+
+        if equipment_type is None:
+            if not name or not self.create_types:
+                raise ValidationError(f"Unknown equipment type {name!r}.")
+            max_length = EquipmentType._meta.get_field("name").max_length
+            if len(name) > max_length:
+                raise ValidationError(
+                    f"equipment_type: Ensure this value has at most {max_length} "
+                    "characters."
+                )
+            equipment_type = EquipmentType.objects.create(name=name)
+            self.equipment_types[name] = equipment_type
+
+        values = {}
+        for field_name in FIELDS + OPTIONAL_FIELDS:
+            value = row.get(field_name)
+            if field_name in OPTIONAL_FIELDS:
+                if value in (None, ""):
+                    continue
+                value = str(value).strip().lower()
+                if value == Equipment.Status.ALLOCATED:
+                    raise ValidationError(
+                        f"{field_name}: Equipments cannot be imported allocated."
+                    )
+            field = Equipment._meta.get_field(field_name)
+            try:
+                values[field_name] = field.clean(value, None)
+            except ValidationError as error:
+                raise ValidationError(
+                    f"{field_name}: {' '.join(error.messages)}"
+                ) from error
+
+        return Equipment(equipment_type=equipment_type, **values)
+
+    def write_batch(self, batch):
+        """
+        Write a batch of equipments in one transaction.
+
+        With upsert, rows repeating a serial number of the batch are merged
+        into the last of them.
+        """
+        with transaction.atomic():
+            existing = {}
+            if self.upsert:
+                batch = list(
+                    {equipment.serial_number: equipment for equipment in batch}.values()
+                )
+                existing = {
+                    equipment.serial_number: equipment
+                    for equipment in Equipment.objects.filter(
+                        serial_number__in=[
+                            equipment.serial_number for equipment in batch
+                        ]
+                    ).only("pk", "serial_number", "equipment_type")
+                }
+
+            new_equipments = defaultdict(list)
+            updated_equipments = {}
+
+            for equipment in batch:
+                current = existing.get(equipment.serial_number)
+                if current is None:
+                    new_equipments[equipment.equipment_type].append(equipment)
+                else:
+                    equipment.pk = current.pk
+                    updated_equipments[current.pk] = equipment
+
+            for equipment_type, equipments in new_equipments.items():
+                labels = equipment_type.reserve_labels(len(equipments))
+                for equipment, label in zip(equipments, labels):
+                    equipment.label = label
+                Equipment.objects.bulk_create(equipments, batch_size=self.batch_size)
+                self.created += len(equipments)
+
+            if updated_equipments:
+                Equipment.objects.bulk_update(
+                    updated_equipments.values(),
+                    ("equipment_type",) + FIELDS,
+                    batch_size=self.batch_size,
+                )
+                self.updated += len(updated_equipments)
+
+            EquipmentType.bump_versions(
+                [equipment.equipment_type_id for equipment in batch]
+                + [equipment.equipment_type_id for equipment in existing.values()]
+            )
+
+    def handle(self, *args, **options):
+        """
+        Overriding handle().
+        """
+        path = Path(options["file"])
+        if not path.exists():
+            raise CommandError(f"{path} does not exist.")
+
+        file_format = options["format"] or (
+            "jsonl" if path.suffix in (".jsonl", ".json") else "csv"
+        )
+
+        self.batch_size = options["batch_size"]
+        self.upsert = options["upsert"]
+        self.create_types = options["create_types"]
+        self.equipment_types = {
+            equipment_type.name: equipment_type
+            for equipment_type in EquipmentType.objects.all()
+        }
+        self.created = self.updated = rejected = 0
+
+        reject_file = None
+        if options["reject_file"]:
+            reject_file = open(
+                options["reject_file"], "w", newline="", encoding="utf-8"
+            )
+            reject_writer = csv.writer(reject_file)
+            reject_writer.writerow(["record", "error", "row"])
+
+        batch = []
+        try:
+            rows = read_rows(path, file_format)
+            for record, (row, raw) in enumerate(rows, start=1):
+                try:
+                    batch.append(self.build_equipment(row))
+                except ValidationError as error:
+                    rejected += 1
+                    if reject_file:
+                        reject_writer.writerow(
+                            [
+                                record,
+                                " ".join(error.messages),
+                                raw if isinstance(raw, str) else json.dumps(raw),
+                            ]
+                        )
+                    continue
+
+                if len(batch) >= self.batch_size:
+                    self.write_batch(batch)
+                    batch = []
+
+            if batch:
+                self.write_batch(batch)
+        finally:
+            if reject_file:
+                reject_file.close()
+
+        self.stdout.write(
+            self.style.SUCCESS(
+                f"Created {self.created}, updated {self.updated}, "
+                f"rejected {rejected} equipments."
+            )
+        )
@@ -0,0 +1,53 @@
+"""
+    Backfill and verify current users of equipments.
+"""
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+from store.models import Equipment
+
+
+class Command(BaseCommand):
+    """
+    Command class to backfill and verify current users of equipments.
+    """
+
+    help = "Recompute Equipment.current_user and status from the latest allocation."
+
+    def add_arguments(self, parser):
+        """
+        Add command arguments.
+        """
+        parser.add_argument(
+            "--check",
+            action="store_true",
+            help="Only report stale equipments, exit with an error if any.",
+        )
+        parser.add_argument("--batch-size", type=int, default=2000)
+
+    def handle(self, *args, **options):
+        """
+        Overriding handle().
+        """
+        stale_equipments = Equipment.get_stale_current_users(
+            chunk_size=options["batch_size"]
+        )
+
+        if options["check"]:
+            if stale_equipments:
+                raise CommandError(
+                    f"{len(stale_equipments)} equipments have a stale current user."
+                )
+            self.stdout.write(self.style.SUCCESS("Current users are up to date."))
+            return
+
+        with transaction.atomic():
+            Equipment.objects.bulk_update(
+                stale_equipments,
+                ["current_user", "status"],
+                batch_size=options["batch_size"],
+            )
+
+        self.stdout.write(
+            self.style.SUCCESS(f"Updated {len(stale_equipments)} equipments.")
+        )
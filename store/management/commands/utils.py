@@ -2,11 +2,47 @@
     Create fake data.
 """
 
-import random
+import os
+from collections import defaultdict, deque
+from concurrent.futures import ProcessPoolExecutor
 
-from django.core.management.base import BaseCommand
+from django.contrib.auth.hashers import make_password
 from django.contrib.auth.models import User
-from store.models import EquipmentType, Equipment, Allocation
+from django.core.management.base import BaseCommand, CommandError
+from django.core.management.color import no_style
+from django.db import connection, connections, transaction
+from django.db.models import Max
+from django.utils import timezone
+from store.generator import build_equipments, build_users, get_equipment_type_name
+from store.models import Allocation, Equipment, EquipmentType
+
+
+def run_chunks(pool, function, tasks, window):
+    """
+    Run tasks on the pool and yield results in order.
+
+    At most ``window`` tasks are in flight, so results do not pile up in
+    memory while the database is slower than the workers.
+    """
+    if pool is None:
+        for task in tasks:
+            yield function(*task)
+        return
+
+    pending = deque()
+    for task in tasks:
+        pending.append(pool.submit(function, *task))
+        if len(pending) >= window:
+            yield pending.popleft().result()
+    while pending:
+        yield pending.popleft().result()
+
+
+def split(total, size):
+    """
+    Split a total into chunk sizes.
+    """
+    return [min(size, total - start) for start in range(0, total, size)]
 
 
 class Command(BaseCommand):
@@ -14,36 +50,211 @@ class Command(BaseCommand):
     Command class to create fake data.
     """
 
-    help = "Generate random data for Department, EquipmentType, Equipment."
+    help = (
+        "Generate random users, equipment types, equipments and allocation "
+        "histories. Rows are built in chunks on a process pool from a seed, "
+        "so the same arguments give the same data."
+    )
+
+    def add_arguments(self, parser):
+        """
+        Add command arguments.
+        """
+        parser.add_argument("--users", type=int, default=5)
+        parser.add_argument("--equipment-types", type=int, default=6)
+        parser.add_argument("--equipment", type=int, default=500)
+        parser.add_argument("--allocations", type=int, default=40)
+        parser.add_argument(
+            "--open-chance",
+            type=float,
+            default=0.3,
+            help="Chance that the last allocation of an available equipment "
+            "stays open, making the equipment allocated.",
+        )
+        parser.add_argument("--seed", type=int, default=0)
+        parser.add_argument("--batch-size", type=int, default=5000)
+        parser.add_argument("--workers", type=int, default=os.cpu_count() or 1)
+        parser.add_argument(
+            "--password",
+            help="Password of generated users, their first name followed by "
+            '"@123" by default.',
+        )
+
+    def create_users(self, pool, options):
+        """
+        Create users in chunks, hashing each distinct password once.
+        """
+        passwords = {}
+        start_id = (User.objects.aggregate(last=Max("pk"))["last"] or 0) + 1
+        tasks = []
+
+        for chunk, count in enumerate(split(options["users"], options["batch_size"])):
+            tasks.append((options["seed"], chunk, start_id, count))
+            start_id += count
+
+        for rows in run_chunks(pool, build_users, tasks, self.window):
+            User.objects.bulk_create(
+                [
+                    User(
+                        id=user_id,
+                        username=username,
+                        first_name=first_name,
+                        last_name=last_name,
+                        email=email,
+                        password=self.get_password(
+                            passwords, options["password"] or f"{first_name}@123"
+                        ),
+                    )
+                    for user_id, username, first_name, last_name, email in rows
+                ]
+            )
+            self.log(f"Created {len(rows)} users.")
+
+    def get_password(self, passwords, password):
+        """
+        Get a password hash, reusing hashes already made.
+        """
+        if password not in passwords:
+            passwords[password] = make_password(password)
+        return passwords[password]
+
+    def create_equipment_types(self, count):
+        """
+        Get or create equipment types.
+        """
+        return [
+            EquipmentType.objects.get_or_create(name=get_equipment_type_name(index))[0]
+            for index in range(count)
+        ]
+
+    def create_equipments(self, pool, equipment_types, options):
+        """
+        Create equipments and their allocations in chunks.
+        """
+        user_ids = list(User.objects.values_list("pk", flat=True))
+        equipment_types = {
+            equipment_type.pk: equipment_type for equipment_type in equipment_types
+        }
+        start_id = (Equipment.objects.aggregate(last=Max("pk"))["last"] or 0) + 1
+        now = timezone.now()
+        tasks = []
+
+        # Spread allocations over chunks in proportion to their equipments.
+        equipment_left = options["equipment"]
+        allocations_left = options["allocations"]
+        for chunk, count in enumerate(
+            split(options["equipment"], options["batch_size"])
+        ):
+            allocation_count = round(allocations_left * count / equipment_left)
+            equipment_left -= count
+            allocations_left -= allocation_count
+
+            tasks.append(
+                (
+                    options["seed"],
+                    chunk,
+                    start_id,
+                    count,
+                    allocation_count,
+                    list(equipment_types),
+                    user_ids,
+                    options["open_chance"],
+                    now,
+                )
+            )
+            start_id += count
+
+        for equipment_rows, allocation_rows in run_chunks(
+            pool, build_equipments, tasks, self.window
+        ):
+            equipments_by_type = defaultdict(list)
+            for row in equipment_rows:
+                equipments_by_type[row[1]].append(
+                    Equipment(
+                        id=row[0],
+                        equipment_type_id=row[1],
+                        serial_number=row[2],
+                        model_number=row[3],
+                        brand=row[4],
+                        price=row[5],
+                        buy_date=row[6],
+                        status=row[7],
+                        current_user_id=row[8],
+                    )
+                )
+
+            with transaction.atomic():
+                equipments = []
+                for equipment_type_id, instances in equipments_by_type.items():
+                    labels = equipment_types[equipment_type_id].reserve_labels(
+                        len(instances)
+                    )
+                    for instance, label in zip(instances, labels):
+                        instance.label = label
+                    equipments.extend(instances)
+
+                Equipment.objects.bulk_create(
+                    sorted(equipments, key=lambda equipment: equipment.pk)
+                )
+                Allocation.objects.bulk_create(
+                    [
+                        Allocation(
+                            equipment_id=equipment_id,
+                            user_id=user_id,
+                            returned=returned,
+                            allocated_at=allocated_at,
+                            returned_at=returned_at,
+                        )
+                        for equipment_id, user_id, returned, allocated_at, returned_at in allocation_rows
+                    ],
+                    batch_size=options["batch_size"],
+                )
+
+            self.log(
+                f"Created {len(equipment_rows)} equipments and "
+                f"{len(allocation_rows)} allocations."
+            )
+
+        EquipmentType.bump_versions(equipment_types)
+
+    def log(self, message):
+        """
+        Write progress with verbosity 2 and up.
+        """
+        if self.verbosity > 1:
+            self.stdout.write(message)
 
     def handle(self, *args, **options):
         """
         Overriding handle().
         """
-        first_names = ["John", "Micheal", "David", "Maria", "Stephen"]
-        last_names = ["Watson", "Pointing", "Dsouza", "Beckham", "Stark"]
-        user_list = []
-
-        for i in range(5):
-            first_name = first_names[i]
-            last_name = last_names[i]
-            username = first_name + last_name + "@123"
-            email = first_name + last_name + "@example.com"
-
-            user = User(
-                username=username,
-                email=email,
-                first_name=first_name,
-                last_name=last_name,
-            )
+        if options["equipment"] and not options["equipment_types"]:
+            raise CommandError("Equipments need at least one equipment type.")
+        if options["batch_size"] < 1:
+            raise CommandError("Batch size must be positive.")
+
+        self.verbosity = options["verbosity"]
+        self.window = 2 * max(options["workers"], 1)
 
-            user.set_password(first_name + "@123")
-            user_list.append(user)
+        # Workers only build rows; close connections so forked workers do
+        # not share the parent's database sockets.
+        connections.close_all()
+        pool = None
+        if options["workers"] > 1:
+            pool = ProcessPoolExecutor(max_workers=options["workers"])
 
-        User.objects.bulk_create(user_list)
+        try:
+            self.create_users(pool, options)
+            equipment_types = self.create_equipment_types(options["equipment_types"])
+            if options["equipment"]:
+                self.create_equipments(pool, equipment_types, options)
+        finally:
+            if pool is not None:
+                pool.shutdown()
 
-        EquipmentType.create_random_equipment_types()
-        Equipment.create_random_equipments()
-        Allocation.create_random_allocations()
+        # Rows were inserted with explicit ids, move sequences past them.
+        with connection.cursor() as cursor:
+            for sql in connection.ops.sequence_reset_sql(no_style(), [User, Equipment]):
+                cursor.execute(sql)
 
         self.stdout.write(self.style.SUCCESS("Random data created."))
@@ -0,0 +1,61 @@
+# Generated by Django 4.2.9 on 2026-10-18 07:50
+"""
+    Module name :- 0006_equipment_current_user
+"""
+
+from django.conf import settings
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+def backfill_current_user(apps, schema_editor):
+    """
+    Set current user from the latest allocation of every equipment.
+    """
+    Equipment = apps.get_model("store", "Equipment")
+    Allocation = apps.get_model("store", "Allocation")
+
+    expected = {}
+    allocations = (
+        Allocation.objects.order_by("pk")
+        .values_list("equipment", "user", "returned")
+        .iterator(chunk_size=2000)
+    )
+    for equipment_id, user_id, returned in allocations:
+        expected[equipment_id] = None if returned else user_id
+
+    Equipment.objects.bulk_update(
+        [
+            Equipment(pk=pk, current_user_id=user_id)
+            for pk, user_id in expected.items()
+            if user_id is not None
+        ],
+        ["current_user"],
+        batch_size=2000,
+    )
+
+
+class Migration(migrations.Migration):
+    """
+    Migration
+    """
+
+    dependencies = [
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+        ("store", "0005_equipment_under_repair"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="equipment",
+            name="current_user",
+            field=models.ForeignKey(
+                blank=True,
+                null=True,
+                on_delete=django.db.models.deletion.SET_NULL,
+                related_name="current_equipments",
+                to=settings.AUTH_USER_MODEL,
+            ),
+        ),
+        migrations.RunPython(backfill_current_user, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,29 @@
+# Generated by Django 4.2.9 on 2026-10-18 07:51
+"""
+    Module name :- 0007_labelsequence
+"""
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    """
+    Migration
+    """
+
+    dependencies = [
+        ("store", "0006_equipment_current_user"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="LabelSequence",
+            fields=[
+                (
+                    "prefix",
+                    models.CharField(max_length=3, primary_key=True, serialize=False),
+                ),
+                ("last_value", models.PositiveBigIntegerField(default=0)),
+            ],
+        ),
+    ]
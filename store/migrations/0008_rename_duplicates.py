@@ -0,0 +1,77 @@
+# Generated by Django 4.2.9 on 2026-10-18 07:51
+"""
+    Module name :- 0008_rename_duplicates
+"""
+
+from django.db import migrations
+from django.db.models import Count
+
+
+def rename_duplicates(apps, schema_editor):
+    """
+    Rename duplicate equipment type names and equipment labels.
+    """
+    EquipmentType = apps.get_model("store", "EquipmentType")
+    Equipment = apps.get_model("store", "Equipment")
+    LabelSequence = apps.get_model("store", "LabelSequence")
+
+    duplicate_names = (
+        EquipmentType.objects.values("name")
+        .annotate(total=Count("pk"))
+        .filter(total__gt=1)
+        .values_list("name", flat=True)
+    )
+    for name in list(duplicate_names):
+        equipment_types = EquipmentType.objects.filter(name=name).order_by("pk")
+        for count, equipment_type in enumerate(equipment_types[1:], start=2):
+            equipment_type.name = f"{name[:45]} ({count})"
+            equipment_type.save(update_fields=["name"])
+
+    duplicate_labels = (
+        Equipment.objects.values("label")
+        .annotate(total=Count("pk"))
+        .filter(total__gt=1)
+        .values_list("label", flat=True)
+    )
+    for label in list(duplicate_labels):
+        equipments = (
+            Equipment.objects.filter(label=label)
+            .select_related("equipment_type")
+            .order_by("pk")
+        )
+        for equipment in equipments[1:]:
+            prefix = equipment.equipment_type.name[:3]
+            sequence = LabelSequence.objects.filter(prefix=prefix).first()
+
+            if sequence is None:
+                last_value = 0
+                for used_label in Equipment.objects.filter(
+                    label__startswith=f"{prefix}-"
+                ).values_list("label", flat=True):
+                    try:
+                        last_value = max(last_value, int(used_label[len(prefix) + 1 :]))
+                    except ValueError:
+                        continue
+                sequence = LabelSequence.objects.create(
+                    prefix=prefix, last_value=last_value
+                )
+
+            sequence.last_value += 1
+            sequence.save(update_fields=["last_value"])
+
+            equipment.label = f"{prefix}-{sequence.last_value:0>6}"
+            equipment.save(update_fields=["label"])
+
+
+class Migration(migrations.Migration):
+    """
+    Migration
+    """
+
+    dependencies = [
+        ("store", "0007_labelsequence"),
+    ]
+
+    operations = [
+        migrations.RunPython(rename_duplicates, migrations.RunPython.noop),
+    ]
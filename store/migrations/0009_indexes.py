@@ -0,0 +1,50 @@
+# Generated by Django 4.2.9 on 2026-10-18 07:51
+"""
+    Module name :- 0009_indexes
+"""
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    """
+    Migration
+    """
+
+    dependencies = [
+        ("store", "0008_rename_duplicates"),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name="equipment",
+            name="label",
+            field=models.CharField(max_length=10, unique=True),
+        ),
+        migrations.AlterField(
+            model_name="equipmenttype",
+            name="name",
+            field=models.CharField(max_length=50, unique=True),
+        ),
+        migrations.AddIndex(
+            model_name="allocation",
+            index=models.Index(
+                fields=["equipment", "returned"], name="store_allocation_equip_idx"
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="allocation",
+            index=models.Index(
+                condition=models.Q(("returned", False)),
+                fields=["equipment"],
+                name="store_allocation_open_idx",
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="equipment",
+            index=models.Index(
+                fields=["equipment_type", "functional", "under_repair", "current_user"],
+                name="store_equipment_state_idx",
+            ),
+        ),
+    ]
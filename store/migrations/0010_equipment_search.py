@@ -0,0 +1,21 @@
+# Generated by Django 4.2.9 on 2026-10-18 08:05
+"""
+    Module name :- 0010_equipment_search
+"""
+
+from django.db import migrations
+from store.search import create_search_index, drop_search_index
+
+
+class Migration(migrations.Migration):
+    """
+    Migration
+    """
+
+    dependencies = [
+        ("store", "0009_indexes"),
+    ]
+
+    operations = [
+        migrations.RunPython(create_search_index, drop_search_index),
+    ]
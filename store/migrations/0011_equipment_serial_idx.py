@@ -0,0 +1,25 @@
+# Generated by Django 4.2.9 on 2026-10-18 07:56
+"""
+    Module name :- 0011_equipment_serial_idx
+"""
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    """
+    Migration
+    """
+
+    dependencies = [
+        ("store", "0010_equipment_search"),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name="equipment",
+            index=models.Index(
+                fields=["serial_number"], name="store_equipment_serial_idx"
+            ),
+        ),
+    ]
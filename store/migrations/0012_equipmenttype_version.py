@@ -0,0 +1,27 @@
+# Generated by Django 4.2.9 on 2026-10-18 08:20
+"""
+    Module name :- 0012_equipmenttype_version
+"""
+
+from django.db import migrations, models
+from store.search import create_search_triggers, drop_search_triggers
+
+
+class Migration(migrations.Migration):
+    """
+    Migration
+    """
+
+    dependencies = [
+        ("store", "0011_equipment_serial_idx"),
+    ]
+
+    operations = [
+        migrations.RunPython(drop_search_triggers, create_search_triggers),
+        migrations.AddField(
+            model_name="equipmenttype",
+            name="version",
+            field=models.PositiveBigIntegerField(default=0),
+        ),
+        migrations.RunPython(create_search_triggers, drop_search_triggers),
+    ]
@@ -0,0 +1,53 @@
+# Generated by Django 4.2.9 on 2026-10-18 07:59
+"""
+    Module name :- 0013_allocation_one_open
+"""
+
+from django.db import migrations, models
+from django.db.models import Count, Max
+
+
+def close_duplicate_allocations(apps, schema_editor):
+    """
+    Close all but the latest open allocation of every equipment.
+    """
+    Allocation = apps.get_model("store", "Allocation")
+
+    duplicates = (
+        Allocation.objects.filter(returned=False)
+        .values("equipment")
+        .annotate(total=Count("pk"), latest=Max("pk"))
+        .filter(total__gt=1)
+        .values_list("equipment", "latest")
+    )
+    for equipment, latest in list(duplicates):
+        Allocation.objects.filter(equipment=equipment, returned=False).exclude(
+            pk=latest
+        ).update(returned=True)
+
+
+class Migration(migrations.Migration):
+    """
+    Migration
+    """
+
+    dependencies = [
+        ("store", "0012_equipmenttype_version"),
+    ]
+
+    operations = [
+        migrations.RunPython(close_duplicate_allocations, migrations.RunPython.noop),
+        migrations.RemoveIndex(
+            model_name="allocation",
+            name="store_allocation_open_idx",
+        ),
+        migrations.AddConstraint(
+            model_name="allocation",
+            constraint=models.UniqueConstraint(
+                condition=models.Q(("returned", False)),
+                fields=("equipment",),
+                name="store_allocation_one_open",
+                violation_error_message="Equipment is already allocated.",
+            ),
+        ),
+    ]
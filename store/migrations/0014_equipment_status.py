@@ -0,0 +1,86 @@
+# Generated by Django 4.2.9 on 2026-10-18 08:04
+"""
+    Module name :- 0014_equipment_status
+"""
+
+from django.db import migrations, models
+from store.search import create_search_triggers, drop_search_triggers
+
+
+def set_statuses(apps, schema_editor):
+    """
+    Derive statuses from the functional, under repair and current user columns.
+    """
+    Equipment = apps.get_model("store", "Equipment")
+    Allocation = apps.get_model("store", "Allocation")
+
+    Equipment.objects.filter(functional=False).update(
+        status="retired", current_user=None
+    )
+    Equipment.objects.filter(functional=True, under_repair=True).update(
+        status="under_repair", current_user=None
+    )
+    Equipment.objects.filter(
+        functional=True, under_repair=False, current_user__isnull=False
+    ).update(status="allocated")
+    Allocation.objects.filter(
+        equipment__status__in=["retired", "under_repair"], returned=False
+    ).update(returned=True)
+
+
+def set_flags(apps, schema_editor):
+    """
+    Derive functional and under repair columns from statuses.
+    """
+    Equipment = apps.get_model("store", "Equipment")
+
+    Equipment.objects.filter(status="retired").update(functional=False)
+    Equipment.objects.filter(status="under_repair").update(under_repair=True)
+
+
+class Migration(migrations.Migration):
+    """
+    Migration
+    """
+
+    dependencies = [
+        ("store", "0013_allocation_one_open"),
+    ]
+
+    operations = [
+        migrations.RunPython(drop_search_triggers, create_search_triggers),
+        migrations.AddField(
+            model_name="equipment",
+            name="status",
+            field=models.CharField(
+                choices=[
+                    ("available", "Available"),
+                    ("allocated", "Allocated"),
+                    ("under_repair", "Under Repair"),
+                    ("retired", "Retired"),
+                ],
+                default="available",
+                max_length=20,
+            ),
+        ),
+        migrations.RunPython(set_statuses, set_flags),
+        migrations.RemoveIndex(
+            model_name="equipment",
+            name="store_equipment_state_idx",
+        ),
+        migrations.RemoveField(
+            model_name="equipment",
+            name="functional",
+        ),
+        migrations.RemoveField(
+            model_name="equipment",
+            name="under_repair",
+        ),
+        migrations.AddIndex(
+            model_name="equipment",
+            index=models.Index(
+                fields=["equipment_type", "status"], name="store_equipment_status_idx"
+            ),
+        ),
+        migrations.RunPython(create_search_triggers, drop_search_triggers),
+    ]
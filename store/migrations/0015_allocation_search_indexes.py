@@ -0,0 +1,60 @@
+# Generated by Django 4.2.9 on 2026-10-18 08:40
+"""
+    Module name :- 0015_allocation_search_indexes
+"""
+
+from django.conf import settings
+from django.db import migrations
+
+# Allocation search filters with icontains, which PostgreSQL runs as
+# UPPER(column::text) LIKE UPPER(pattern); trigram indexes on the same
+# expressions serve these filters. Other databases scan either way.
+POSTGRESQL_CREATE = [
+    "CREATE EXTENSION IF NOT EXISTS pg_trgm",
+    """
+    CREATE INDEX IF NOT EXISTS store_equipment_label_trgm_idx
+    ON store_equipment USING gin ((UPPER(label::text)) gin_trgm_ops)
+    """,
+    """
+    CREATE INDEX IF NOT EXISTS store_user_username_trgm_idx
+    ON auth_user USING gin ((UPPER(username::text)) gin_trgm_ops)
+    """,
+]
+
+POSTGRESQL_DROP = [
+    "DROP INDEX IF EXISTS store_equipment_label_trgm_idx",
+    "DROP INDEX IF EXISTS store_user_username_trgm_idx",
+]
+
+
+def create_trigram_indexes(apps, schema_editor):
+    """
+    Create trigram indexes for allocation search.
+    """
+    if schema_editor.connection.vendor == "postgresql":
+        for statement in POSTGRESQL_CREATE:
+            schema_editor.execute(statement)
+
+
+def drop_trigram_indexes(apps, schema_editor):
+    """
+    Drop trigram indexes for allocation search.
+    """
+    if schema_editor.connection.vendor == "postgresql":
+        for statement in POSTGRESQL_DROP:
+            schema_editor.execute(statement)
+
+
+class Migration(migrations.Migration):
+    """
+    Migration
+    """
+
+    dependencies = [
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+        ("store", "0014_equipment_status"),
+    ]
+
+    operations = [
+        migrations.RunPython(create_trigram_indexes, drop_trigram_indexes),
+    ]
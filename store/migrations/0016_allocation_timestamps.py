@@ -0,0 +1,65 @@
+# Generated by Django 4.2.9 on 2026-10-18 08:55
+"""
+    Module name :- 0016_allocation_timestamps
+"""
+
+from datetime import datetime, time
+
+from django.db import migrations, models
+from django.utils import timezone
+
+
+def backfill_timestamps(apps, schema_editor):
+    """
+    Backfill allocation times of existing allocations with known bounds.
+
+    Existing allocations carry no dates, so they are marked allocated at
+    the buy date of their equipment, the earliest they can have started,
+    and returned allocations are marked returned now, the latest they can
+    have ended. Both are estimates, so the allocations are flagged
+    backfilled and point-in-time queries leave them out.
+    """
+    Allocation = apps.get_model("store", "Allocation")
+    Equipment = apps.get_model("store", "Equipment")
+
+    buy_dates = Equipment.objects.values_list("buy_date", flat=True).distinct()
+    for buy_date in buy_dates.order_by():
+        Allocation.objects.filter(
+            equipment__buy_date=buy_date, allocated_at__isnull=True
+        ).update(
+            allocated_at=timezone.make_aware(datetime.combine(buy_date, time.min)),
+            backfilled=True,
+        )
+
+    Allocation.objects.filter(returned=True, returned_at__isnull=True).update(
+        returned_at=timezone.now()
+    )
+
+
+class Migration(migrations.Migration):
+    """
+    Migration
+    """
+
+    dependencies = [
+        ("store", "0015_allocation_search_indexes"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="allocation",
+            name="allocated_at",
+            field=models.DateTimeField(null=True),
+        ),
+        migrations.AddField(
+            model_name="allocation",
+            name="returned_at",
+            field=models.DateTimeField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name="allocation",
+            name="backfilled",
+            field=models.BooleanField(default=False),
+        ),
+        migrations.RunPython(backfill_timestamps, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,38 @@
+# Generated by Django 4.2.9 on 2026-10-18 08:56
+"""
+    Module name :- 0017_allocation_time_indexes
+"""
+
+from django.db import migrations, models
+import django.utils.timezone
+
+
+class Migration(migrations.Migration):
+    """
+    Migration
+    """
+
+    dependencies = [
+        ("store", "0016_allocation_timestamps"),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name="allocation",
+            name="allocated_at",
+            field=models.DateTimeField(default=django.utils.timezone.now),
+        ),
+        migrations.AddIndex(
+            model_name="allocation",
+            index=models.Index(
+                fields=["equipment", "allocated_at"], name="store_allocation_held_idx"
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="allocation",
+            index=models.Index(
+                fields=["returned_at", "allocated_at"],
+                name="store_allocation_period_idx",
+            ),
+        ),
+    ]
@@ -0,0 +1,65 @@
+# Generated by Django 4.2.9 on 2026-10-18 09:10
+"""
+    Module name :- 0018_allocationarchive
+"""
+
+from django.conf import settings
+from django.db import migrations, models
+import django.db.models.deletion
+import django.utils.timezone
+
+
+class Migration(migrations.Migration):
+    """
+    Migration
+    """
+
+    dependencies = [
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+        ("store", "0017_allocation_time_indexes"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="AllocationArchive",
+            fields=[
+                ("id", models.BigIntegerField(primary_key=True, serialize=False)),
+                ("returned", models.BooleanField(default=True)),
+                ("allocated_at", models.DateTimeField()),
+                ("returned_at", models.DateTimeField()),
+                ("backfilled", models.BooleanField(default=False)),
+                (
+                    "archived_at",
+                    models.DateTimeField(default=django.utils.timezone.now),
+                ),
+                (
+                    "equipment",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="archived_allocations",
+                        to="store.equipment",
+                    ),
+                ),
+                (
+                    "user",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="archived_allocations",
+                        to=settings.AUTH_USER_MODEL,
+                    ),
+                ),
+            ],
+            options={
+                "indexes": [
+                    models.Index(
+                        fields=["equipment", "allocated_at"],
+                        name="store_archive_held_idx",
+                    ),
+                    models.Index(
+                        fields=["returned_at", "allocated_at"],
+                        name="store_archive_period_idx",
+                    ),
+                ],
+            },
+        ),
+    ]
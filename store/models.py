@@ -2,12 +2,15 @@
     Module name :- models
 """
 
-import random
-from datetime import date, timedelta
-
-from django.db import models
+from django.core.exceptions import ValidationError
+from django.db import models, transaction
 from django.contrib.auth.models import User
-from django.db.models import Manager
+from django.utils import timezone
+from django.db.models import Case, Count, F, Manager, Q, Value, When
+from monitoring.tracing import traced
+
+HISTORY_PAGE_SIZE = 20
+MAX_LABEL_NUMBER = 999_999
 
 
 # Create your models here.
@@ -16,30 +19,69 @@ class EquipmentType(models.Model):
     Equipment Type Model.
     """
 
-    name = models.CharField(max_length=50)
+    name = models.CharField(max_length=50, unique=True)
+    version = models.PositiveBigIntegerField(default=0)
 
     objects = Manager()
 
-    @property
-    def get_remaining_equipments(self):
+    @classmethod
+    def get_equipment_counts(cls):
+        """
+        Get equipment types annotated with their equipment counts.
+        """
+        status = Equipment.Status
+
+        return cls.objects.annotate(
+            available_count=Count(
+                "equipment", filter=Q(equipment__status=status.AVAILABLE)
+            ),
+            assigned_count=Count(
+                "equipment", filter=Q(equipment__status=status.ALLOCATED)
+            ),
+            under_repair_count=Count(
+                "equipment", filter=Q(equipment__status=status.UNDER_REPAIR)
+            ),
+            retired_count=Count(
+                "equipment", filter=Q(equipment__status=status.RETIRED)
+            ),
+        )
+
+    @classmethod
+    def bump_versions(cls, equipment_type_ids):
         """
-        Get total equipments.
+        Bump versions of equipment types whose equipments changed.
         """
-        return len(Equipment.get_non_assigned_equipments(self))
+        cls.objects.filter(pk__in=set(equipment_type_ids)).update(
+            version=F("version") + 1
+        )
 
-    @classmethod
-    def create_random_equipment_types(cls):
+    @property
+    def label_prefix(self):
         """
-        Create random equipment types.
+        Get the label prefix, the first three letters of the name.
         """
-        equipment_types = ["Laptop", "Monitor", "Keyboard", "Mouse", "Speaker", "CPU"]
+        return self.name[:3]
 
-        equipment_type_list = []
+    def get_label(self, number):
+        """
+        Get label for a sequence number.
+        """
+        return f"{self.label_prefix}-{number:0>6}"
 
-        for equipment_type in equipment_types:
-            equipment_type_list.append(cls(name=equipment_type))
+    def get_next_label(self):
+        """
+        Get next label without reserving it.
+        """
+        return self.get_label(LabelSequence.get_last_value(self.label_prefix) + 1)
 
-        cls.objects.bulk_create(equipment_type_list)
+    def reserve_labels(self, count=1):
+        """
+        Reserve labels for new equipments.
+        """
+        return [
+            self.get_label(number)
+            for number in LabelSequence.reserve(self.label_prefix, count)
+        ]
 
     def __str__(self):
         """
@@ -53,7 +95,19 @@ class Equipment(models.Model):
     Equipment Model.
     """
 
-    label = models.CharField(max_length=10)
+    class Status(models.TextChoices):
+        """
+        Lifecycle status of an equipment.
+        """
+
+        AVAILABLE = "available", "Available"
+        ALLOCATED = "allocated", "Allocated"
+        UNDER_REPAIR = "under_repair", "Under Repair"
+        RETIRED = "retired", "Retired"
+
+    IN_SERVICE = (Status.AVAILABLE, Status.ALLOCATED)
+
+    label = models.CharField(max_length=10, unique=True)
     serial_number = models.CharField(max_length=20)
     model_number = models.CharField(max_length=20)
     brand = models.CharField(max_length=30)
@@ -62,39 +116,135 @@ class Equipment(models.Model):
     equipment_type = models.ForeignKey(
         EquipmentType, on_delete=models.CASCADE, related_name="equipment"
     )
-    under_repair = models.BooleanField(default=False)
-    functional = models.BooleanField(default=True)
+    status = models.CharField(
+        max_length=20, choices=Status.choices, default=Status.AVAILABLE
+    )
+    current_user = models.ForeignKey(
+        User,
+        on_delete=models.SET_NULL,
+        null=True,
+        blank=True,
+        related_name="current_equipments",
+    )
 
     objects = Manager()
 
-    @property
+    class Meta:
+        """
+        Meta class for Equipment.
+        """
+
+        indexes = [
+            models.Index(
+                fields=["equipment_type", "status"], name="store_equipment_status_idx"
+            ),
+            models.Index(fields=["serial_number"], name="store_equipment_serial_idx"),
+        ]
+
+    @traced
     def set_label(self):
         """
         Automatically set label.
         """
-        try:
-            temp_id = list(self.equipment_type.equipment.all())[-1]
-            count = int(temp_id.label[4:]) + 1
-        except IndexError:
-            count = 1
-        return f"{self.equipment_type.name[:3]}-{count:0>6}"
+        self.label = self.equipment_type.reserve_labels()[0]
 
-    @property
-    def get_current_user(self):
+    def get_history(self, before=None, limit=HISTORY_PAGE_SIZE):
         """
-        Get current user for equipment.
+        Get a page of allocations of the equipment, newest first.
+
+        ``before`` is the primary key of the last allocation of the previous
+        page. Archived allocations keep their primary keys, so both tables
+        are read up to the page size and merged. Returns the allocations and
+        whether older ones exist.
         """
-        allocations = list(self.allocation.all())
-        if allocations:
-            return allocations[-1].user if not allocations[-1].returned else "No User"
-        return "No User"
+        history = []
+        for allocations in (self.allocation, self.archived_allocations):
+            allocations = (
+                allocations.select_related("user")
+                .only("pk", "equipment", "returned", "user__username")
+                .order_by("-pk")
+            )
+            if before is not None:
+                allocations = allocations.filter(pk__lt=before)
+            history.extend(allocations[: limit + 1])
 
-    @property
-    def get_all_users(self):
+        history.sort(key=lambda allocation: allocation.pk, reverse=True)
+        return history[:limit], len(history) > limit
+
+    def sync_current_user(self):
         """
-        Get all users used the equipment.
+        Refresh current user from the open allocation.
         """
-        return [allocation.user for allocation in self.allocation.all()][::-1]
+        self.current_user_id = (
+            self.allocation.filter(returned=False)
+            .values_list("user", flat=True)
+            .first()
+        )
+
+        Equipment.objects.filter(pk=self.pk).update(
+            current_user=self.current_user_id,
+            status=Case(
+                When(
+                    status__in=self.IN_SERVICE,
+                    then=Value(
+                        self.get_holder_status(self.status, self.current_user_id)
+                    ),
+                ),
+                default=F("status"),
+            ),
+        )
+        EquipmentType.bump_versions([self.equipment_type_id])
+
+    @classmethod
+    def get_holder_status(cls, status, user_id):
+        """
+        Get status matching the current user of an equipment in service.
+        """
+        if status not in cls.IN_SERVICE:
+            return status
+        return cls.Status.ALLOCATED if user_id else cls.Status.AVAILABLE
+
+    @classmethod
+    def get_stale_current_users(cls, chunk_size=2000):
+        """
+        Get equipments whose current user disagrees with their allocations.
+        """
+        expected = {}
+        allocations = (
+            Allocation.objects.order_by("pk")
+            .values_list("equipment", "user", "returned")
+            .iterator(chunk_size=chunk_size)
+        )
+        for equipment_id, user_id, returned in allocations:
+            expected[equipment_id] = None if returned else user_id
+
+        return [
+            cls(
+                pk=pk,
+                current_user_id=expected.get(pk),
+                status=cls.get_holder_status(status, expected.get(pk)),
+            )
+            for pk, current_user_id, status in cls.objects.values_list(
+                "pk", "current_user", "status"
+            ).iterator(chunk_size=chunk_size)
+            if expected.get(pk) != current_user_id
+            or cls.get_holder_status(status, expected.get(pk)) != status
+        ]
+
+    @classmethod
+    def get_filtered_equipments(cls, equipment_type, filtering):
+        """
+        Get equipments for a list filter.
+        """
+        if filtering == "available":
+            return cls.get_non_assigned_equipments(equipment_type)
+        if filtering == "assigned":
+            return cls.get_assigned_equipments(equipment_type)
+        if filtering == "under_repair":
+            return cls.get_under_repair_equipments(equipment_type)
+        if filtering == "retired":
+            return cls.get_retired_equipments(equipment_type)
+        return cls.get_all_functional_equipments(equipment_type)
 
     @classmethod
     def get_all_functional_equipments(cls, equipment_type):
@@ -102,7 +252,7 @@ class Equipment(models.Model):
         Get Functional Equipments.
         """
         return cls.objects.filter(
-            equipment_type=equipment_type, functional=True, under_repair=False
+            equipment_type=equipment_type, status__in=cls.IN_SERVICE
         )
 
     @classmethod
@@ -111,89 +261,49 @@ class Equipment(models.Model):
         Get under repaired equipments.
         """
         return cls.objects.filter(
-            equipment_type=equipment_type, functional=True, under_repair=True
+            equipment_type=equipment_type, status=cls.Status.UNDER_REPAIR
         )
 
     @classmethod
+    def get_retired_equipments(cls, equipment_type):
+        """
+        Get retired equipments.
+        """
+        return cls.objects.filter(
+            equipment_type=equipment_type, status=cls.Status.RETIRED
+        )
+
+    @classmethod
+    @traced
     def get_assigned_equipments(cls, equipment_type):
         """
         Get assigned equipments.
         """
-        equipments = cls.objects.filter(
-            equipment_type=equipment_type, functional=True, under_repair=False
+        return cls.objects.filter(
+            equipment_type=equipment_type, status=cls.Status.ALLOCATED
         )
-        assigned_equipments = []
-
-        for equipment in equipments:
-            allocations = equipment.allocation.all()
-            if not allocations:
-                continue
-
-            last_allocation = list(allocations)[-1]
-            if not last_allocation.returned:
-                assigned_equipments.append(equipment)
-
-        return assigned_equipments
 
     @classmethod
+    @traced
     def get_non_assigned_equipments(cls, equipment_type):
         """
         Get non-assigned equipments.
         """
-        equipments = cls.objects.filter(
-            equipment_type=equipment_type, functional=True, under_repair=False
+        return cls.objects.filter(
+            equipment_type=equipment_type, status=cls.Status.AVAILABLE
         )
-        non_assigned_equipments = []
-
-        for equipment in equipments:
-            allocations = equipment.allocation.all()
-            if not allocations:
-                non_assigned_equipments.append(equipment)
-                continue
-
-            last_allocation = list(allocations)[-1]
-            if last_allocation.returned:
-                non_assigned_equipments.append(equipment)
-
-        return non_assigned_equipments
 
     @classmethod
+    @traced
     def get_ids(cls, equipment_type):
         """
         Get equipment ids.
         """
-        return [
-            (equipment.pk, equipment.label)
-            for equipment in cls.get_non_assigned_equipments(equipment_type)
-        ]
-
-    @classmethod
-    def create_random_equipments(cls):
-        """
-        Create random equipments.
-        """
-        equipment_types = list(EquipmentType.objects.all())
-        functionality = [True, False]
-        serial_numbers = [
-            f"{random.randint(0, 9)}{random.randint(0, 9)}{random.randint(0, 9)}"
-            for _ in range(1000)
-        ]
-        model_numbers = [f"Model-{number}" for number in serial_numbers]
-        buy_dates = [date.today() - timedelta(days=x) for x in range(40)]
-        brands = ["Samsung", "Nokia", "Microsoft", "Apple", "Logitech", "Dell"]
-
-        for _ in range(500):
-            instance = cls(
-                buy_date=random.choice(buy_dates),
-                price=random.randint(1000, 10000),
-                serial_number=random.choice(serial_numbers),
-                model_number=random.choice(model_numbers),
-                equipment_type=random.choice(equipment_types),
-                functional=random.choice(functionality),
-                brand=random.choice(brands),
-            )
-            instance.label = instance.set_label
-            instance.save()
+        return list(
+            cls.get_non_assigned_equipments(equipment_type)
+            .order_by("pk")
+            .values_list("pk", "label")
+        )
 
     def __str__(self):
         """
@@ -212,6 +322,116 @@ class Allocation(models.Model):
     )
     user = models.ForeignKey(User, on_delete=models.CASCADE)
     returned = models.BooleanField(default=False)
+    allocated_at = models.DateTimeField(default=timezone.now)
+    returned_at = models.DateTimeField(null=True, blank=True)
+    # Allocations made before times were recorded got estimated times.
+    backfilled = models.BooleanField(default=False)
+
+    class Meta:
+        """
+        Meta class for Allocation.
+        """
+
+        indexes = [
+            models.Index(
+                fields=["equipment", "returned"], name="store_allocation_equip_idx"
+            ),
+            models.Index(
+                fields=["equipment", "allocated_at"], name="store_allocation_held_idx"
+            ),
+            models.Index(
+                fields=["returned_at", "allocated_at"],
+                name="store_allocation_period_idx",
+            ),
+        ]
+        constraints = [
+            models.UniqueConstraint(
+                fields=["equipment"],
+                condition=Q(returned=False),
+                name="store_allocation_one_open",
+                violation_error_message="Equipment is already allocated.",
+            ),
+        ]
+
+    def save(self, *args, **kwargs):
+        """
+        Keep the return time in step with the returned flag.
+        """
+        if not self.returned:
+            self.returned_at = None
+        elif self.returned_at is None:
+            self.returned_at = timezone.now()
+
+        if kwargs.get("update_fields") is not None:
+            kwargs["update_fields"] = {*kwargs["update_fields"], "returned_at"}
+        super().save(*args, **kwargs)
+
+    @classmethod
+    def get_holder_at(cls, equipment, moment):
+        """
+        Get the allocation holding an equipment at a moment, archived or not.
+
+        Allocations made at the same moment are told apart by primary key,
+        which archived rows keep, so the latest one holds the equipment.
+        Allocations with estimated times are left out, so the holder is
+        unknown (None) for moments they may cover.
+        """
+        allocations = [
+            model.objects.filter(
+                equipment=equipment, allocated_at__lte=moment, backfilled=False
+            )
+            .select_related("user")
+            .order_by("-allocated_at", "-pk")
+            .first()
+            for model in (cls, AllocationArchive)
+        ]
+        allocation = max(
+            filter(None, allocations),
+            key=lambda allocation: (allocation.allocated_at, allocation.pk),
+            default=None,
+        )
+        if allocation and (
+            allocation.returned_at is None or allocation.returned_at > moment
+        ):
+            return allocation
+        return None
+
+    @classmethod
+    def get_outstanding_at(cls, moment, *fields):
+        """
+        Get rows of allocations open at a moment, archived ones included.
+
+        Allocations with estimated times are left out.
+        """
+        open_at = Q(
+            Q(returned_at__gt=moment) | Q(returned_at__isnull=True),
+            allocated_at__lte=moment,
+            backfilled=False,
+        )
+        return (
+            cls.objects.filter(open_at)
+            .values(*fields)
+            .union(AllocationArchive.objects.filter(open_at).values(*fields), all=True)
+        )
+
+    @classmethod
+    def has_backfilled(cls):
+        """
+        Check whether any allocation, archived or not, has estimated times.
+        """
+        return (
+            cls.objects.filter(backfilled=True).exists()
+            or AllocationArchive.objects.filter(backfilled=True).exists()
+        )
+
+    @classmethod
+    def get_all_allocations(cls, *fields):
+        """
+        Get rows of all allocations, archived ones included.
+        """
+        return cls.objects.values(*fields).union(
+            AllocationArchive.objects.values(*fields), all=True
+        )
 
     @classmethod
     def get_non_returned_allocations(cls):
@@ -221,29 +441,227 @@ class Allocation(models.Model):
         return cls.objects.filter(returned=False)
 
     @classmethod
-    def create_random_allocations(cls):
+    def select_list_columns(cls, queryset, *fields):
         """
-        Create fake allocation.
+        Load allocations with only the equipment and user columns lists show.
         """
-        users = list(User.objects.all())
-        equipments = list(Equipment.objects.all())
-        returned = [True, False]
+        return queryset.select_related("equipment", "user").only(
+            "pk", "equipment__label", "user__username", *fields
+        )
 
-        allocation_list = []
+    @classmethod
+    def search_non_returned_allocations(cls, search):
+        """
+        Search non-returned allocations by username and equipment label.
+        """
+        return cls.get_non_returned_allocations().filter(
+            Q(user__username__icontains=search) | Q(equipment__label__icontains=search)
+        )
 
-        for _ in range(40):
-            allocation = cls(
-                user=random.choice(users),
-                equipment=random.choice(equipments),
-                returned=random.choice(returned),
-            )
+    def __str__(self):
+        """
+        String representation.
+        """
+        return f"{self.equipment} - {self.user}"
+
+
+class ArchiveError(Exception):
+    """
+    Archived allocations cannot be changed or deleted.
+    """
+
+
+class AllocationArchiveQuerySet(models.QuerySet):
+    """
+    Query set of archived allocations, refusing bulk changes.
+    """
+
+    def update(self, **kwargs):
+        """
+        Refuse to update archived allocations.
+        """
+        raise ArchiveError("Archived allocations cannot be changed.")
+
+    def bulk_update(self, objs, fields, batch_size=None):
+        """
+        Refuse to update archived allocations.
+        """
+        raise ArchiveError("Archived allocations cannot be changed.")
+
+    def delete(self):
+        """
+        Refuse to delete archived allocations.
+        """
+        raise ArchiveError("Archived allocations cannot be deleted.")
+
+
+class AllocationArchive(models.Model):
+    """
+    Returned allocation moved out of the allocation table.
+
+    Rows keep the primary key they had as allocations and are only ever
+    inserted by the archive_allocations command. They go away only with
+    their equipment or user.
+    """
+
+    id = models.BigIntegerField(primary_key=True)
+    equipment = models.ForeignKey(
+        Equipment, on_delete=models.CASCADE, related_name="archived_allocations"
+    )
+    user = models.ForeignKey(
+        User, on_delete=models.CASCADE, related_name="archived_allocations"
+    )
+    returned = models.BooleanField(default=True)
+    allocated_at = models.DateTimeField()
+    returned_at = models.DateTimeField()
+    backfilled = models.BooleanField(default=False)
+    archived_at = models.DateTimeField(default=timezone.now)
 
-            allocation_list.append(allocation)
+    objects = AllocationArchiveQuerySet.as_manager()
 
-        cls.objects.bulk_create(allocation_list)
+    class Meta:
+        """
+        Meta class for AllocationArchive.
+        """
+
+        indexes = [
+            models.Index(
+                fields=["equipment", "allocated_at"],
+                name="store_archive_held_idx",
+            ),
+            models.Index(
+                fields=["returned_at", "allocated_at"],
+                name="store_archive_period_idx",
+            ),
+        ]
+
+    @classmethod
+    def archive(cls, cutoff, batch_size=1000):
+        """
+        Move allocations returned before the cutoff into the archive.
+
+        Every batch is moved in its own transaction. Returns the number of
+        archived allocations.
+        """
+        archived = 0
+        while True:
+            with transaction.atomic():
+                rows = list(
+                    Allocation.objects.select_for_update()
+                    .filter(returned=True, returned_at__lt=cutoff)
+                    .order_by("pk")
+                    .values(
+                        "id",
+                        "equipment_id",
+                        "user_id",
+                        "allocated_at",
+                        "returned_at",
+                        "backfilled",
+                    )[:batch_size]
+                )
+                if not rows:
+                    return archived
+
+                cls.objects.bulk_create([cls(**row) for row in rows])
+                Allocation.objects.filter(pk__in=[row["id"] for row in rows]).delete()
+                archived += len(rows)
+
+    def save(self, *args, **kwargs):
+        """
+        Insert a new archived allocation, refusing to update existing ones.
+        """
+        if not self._state.adding:
+            raise ArchiveError("Archived allocations cannot be changed.")
+        kwargs["force_insert"] = True
+        super().save(*args, **kwargs)
+
+    def delete(self, *args, **kwargs):
+        """
+        Refuse to delete an archived allocation.
+        """
+        raise ArchiveError("Archived allocations cannot be deleted.")
 
     def __str__(self):
         """
         String representation.
         """
         return f"{self.equipment} - {self.user}"
+
+
+class LabelSequence(models.Model):
+    """
+    Label sequence of a label prefix.
+
+    Equipment types whose names start with the same three letters share a
+    prefix, so they share the sequence and their labels stay unique.
+    """
+
+    prefix = models.CharField(max_length=3, primary_key=True)
+    last_value = models.PositiveBigIntegerField(default=0)
+
+    objects = Manager()
+
+    @classmethod
+    def get_last_used_value(cls, prefix):
+        """
+        Get highest label number already used with a prefix.
+        """
+        last_value = 0
+        labels = (
+            Equipment.objects.filter(label__startswith=f"{prefix}-")
+            .values_list("label", flat=True)
+            .iterator()
+        )
+        for label in labels:
+            try:
+                last_value = max(last_value, int(label[len(prefix) + 1 :]))
+            except ValueError:
+                continue
+        return last_value
+
+    @classmethod
+    def get_last_value(cls, prefix):
+        """
+        Get last reserved label number.
+        """
+        last_value = (
+            cls.objects.filter(prefix=prefix)
+            .values_list("last_value", flat=True)
+            .first()
+        )
+        if last_value is None:
+            return cls.get_last_used_value(prefix)
+        return last_value
+
+    @classmethod
+    def reserve(cls, prefix, count=1):
+        """
+        Reserve a block of label numbers.
+
+        Labels have room for six digit numbers, so a block going past
+        MAX_LABEL_NUMBER raises ValidationError and reserves nothing.
+        """
+        sequence = cls.objects.filter(prefix=prefix)
+
+        with transaction.atomic():
+            if not sequence.update(last_value=F("last_value") + count):
+                cls.objects.get_or_create(
+                    prefix=prefix,
+                    defaults={"last_value": cls.get_last_used_value(prefix)},
+                )
+                sequence.update(last_value=F("last_value") + count)
+
+            last_value = sequence.values_list("last_value", flat=True).get()
+            if last_value > MAX_LABEL_NUMBER:
+                raise ValidationError(
+                    f"No labels left for {prefix}, numbers are limited "
+                    f"to {MAX_LABEL_NUMBER}."
+                )
+
+        return range(last_value - count + 1, last_value + 1)
+
+    def __str__(self):
+        """
+        String representation.
+        """
+        return f"{self.prefix} - {self.last_value}"
@@ -0,0 +1,134 @@
+"""
+    Module name :- pagination
+"""
+
+from django.core import signing
+from django.http import Http404
+
+
+class CursorPage:
+    """
+    Page of a cursor paginated queryset.
+    """
+
+    def __init__(self, object_list, next_cursor=None, previous_cursor=None):
+        """
+        Initializer.
+        """
+        self.object_list = object_list
+        self.next_cursor = next_cursor
+        self.previous_cursor = previous_cursor
+
+    def __iter__(self):
+        """
+        Iterate over page objects.
+        """
+        return iter(self.object_list)
+
+    def __len__(self):
+        """
+        Number of page objects.
+        """
+        return len(self.object_list)
+
+    def has_next(self):
+        """
+        Check if there is a next page.
+        """
+        return self.next_cursor is not None
+
+    def has_previous(self):
+        """
+        Check if there is a previous page.
+        """
+        return self.previous_cursor is not None
+
+    def has_other_pages(self):
+        """
+        Check if there are other pages.
+        """
+        return self.has_next() or self.has_previous()
+
+
+class CursorPaginationMixin:
+    """
+    Keyset pagination for list views, newest first.
+
+    Requests with a ``page`` parameter fall back to page number pagination.
+    Views ordering by something else than a unique column, such as search
+    rank, set ``cursor_field`` to None to always use page numbers.
+    """
+
+    cursor_field = "pk"
+    cursor_salt = "store.pagination"
+
+    def encode_cursor(self, value, direction):
+        """
+        Encode an opaque cursor token.
+        """
+        return signing.dumps([value, direction], salt=self.cursor_salt)
+
+    def decode_cursor(self, cursor):
+        """
+        Decode an opaque cursor token.
+        """
+        try:
+            value, direction = signing.loads(cursor, salt=self.cursor_salt)
+        except (signing.BadSignature, TypeError, ValueError) as error:
+            raise Http404("Invalid cursor.") from error
+        return value, direction
+
+    def paginate_queryset(self, queryset, page_size):
+        """
+        Paginate queryset by cursor.
+        """
+        field = self.cursor_field
+
+        if field is None:
+            return super().paginate_queryset(queryset, page_size)
+
+        if "page" in self.request.GET:
+            return super().paginate_queryset(queryset.order_by(f"-{field}"), page_size)
+
+        cursor = self.request.GET.get("cursor")
+        value, direction = self.decode_cursor(cursor) if cursor else (None, "next")
+
+        if direction == "previous":
+            queryset = queryset.filter(**{f"{field}__gt": value}).order_by(field)
+        elif value is not None:
+            queryset = queryset.filter(**{f"{field}__lt": value}).order_by(f"-{field}")
+        else:
+            queryset = queryset.order_by(f"-{field}")
+
+        object_list = list(queryset[: page_size + 1])
+        has_more = len(object_list) > page_size
+        object_list = object_list[:page_size]
+
+        if direction == "previous":
+            object_list.reverse()
+            has_next, has_previous = True, has_more
+        else:
+            has_next, has_previous = has_more, value is not None
+
+        page = CursorPage(object_list)
+        if object_list and has_next:
+            page.next_cursor = self.encode_cursor(
+                getattr(object_list[-1], field), "next"
+            )
+        if object_list and has_previous:
+            page.previous_cursor = self.encode_cursor(
+                getattr(object_list[0], field), "previous"
+            )
+
+        return (None, page, object_list, page.has_other_pages())
+
+    def get_context_data(self, **kwargs):
+        """
+        Add query string without pagination parameters.
+        """
+        context = super().get_context_data(**kwargs)
+        query = self.request.GET.copy()
+        query.pop("page", None)
+        query.pop("cursor", None)
+        context["page_query"] = query.urlencode()
+        return context
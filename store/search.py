@@ -0,0 +1,328 @@
+"""
+    Module name :- search
+"""
+
+import re
+
+from django.db import connection
+from django.db.models import BooleanField, F, FloatField, Q
+from django.db.models.expressions import RawSQL
+
+SEARCH_TABLE = "store_equipment_search"
+
+SQLITE_CREATE_TABLE = [
+    f"""
+    CREATE VIRTUAL TABLE {SEARCH_TABLE} USING fts5(
+        label, serial_number, model_number, brand, type_name, prefix='2 3'
+    )
+    """,
+    f"""
+    INSERT INTO {SEARCH_TABLE}
+        (rowid, label, serial_number, model_number, brand, type_name)
+    SELECT e.id, e.label, e.serial_number, e.model_number, e.brand, t.name
+    FROM store_equipment e
+    INNER JOIN store_equipmenttype t ON t.id = e.equipment_type_id
+    """,
+]
+
+SQLITE_CREATE_TRIGGERS = [
+    f"""
+    CREATE TRIGGER {SEARCH_TABLE}_insert AFTER INSERT ON store_equipment
+    BEGIN
+        INSERT INTO {SEARCH_TABLE}
+            (rowid, label, serial_number, model_number, brand, type_name)
+        SELECT NEW.id, NEW.label, NEW.serial_number, NEW.model_number,
+            NEW.brand, t.name
+        FROM store_equipmenttype t WHERE t.id = NEW.equipment_type_id;
+    END
+    """,
+    f"""
+    CREATE TRIGGER {SEARCH_TABLE}_update AFTER UPDATE OF
+        label, serial_number, model_number, brand, equipment_type_id
+    ON store_equipment
+    BEGIN
+        DELETE FROM {SEARCH_TABLE} WHERE rowid = OLD.id;
+        INSERT INTO {SEARCH_TABLE}
+            (rowid, label, serial_number, model_number, brand, type_name)
+        SELECT NEW.id, NEW.label, NEW.serial_number, NEW.model_number,
+            NEW.brand, t.name
+        FROM store_equipmenttype t WHERE t.id = NEW.equipment_type_id;
+    END
+    """,
+    f"""
+    CREATE TRIGGER {SEARCH_TABLE}_delete AFTER DELETE ON store_equipment
+    BEGIN
+        DELETE FROM {SEARCH_TABLE} WHERE rowid = OLD.id;
+    END
+    """,
+    f"""
+    CREATE TRIGGER {SEARCH_TABLE}_type_update AFTER UPDATE OF name
+    ON store_equipmenttype
+    BEGIN
+        UPDATE {SEARCH_TABLE} SET type_name = NEW.name WHERE rowid IN (
+            SELECT id FROM store_equipment WHERE equipment_type_id = NEW.id
+        );
+    END
+    """,
+]
+
+SQLITE_DROP = [
+    f"DROP TRIGGER IF EXISTS {SEARCH_TABLE}_insert",
+    f"DROP TRIGGER IF EXISTS {SEARCH_TABLE}_update",
+    f"DROP TRIGGER IF EXISTS {SEARCH_TABLE}_delete",
+    f"DROP TRIGGER IF EXISTS {SEARCH_TABLE}_type_update",
+    f"DROP TABLE IF EXISTS {SEARCH_TABLE}",
+]
+
+POSTGRESQL_CREATE_TABLE = [
+    "CREATE EXTENSION IF NOT EXISTS pg_trgm",
+    f"""
+    CREATE TABLE {SEARCH_TABLE} (
+        equipment_id bigint PRIMARY KEY,
+        content text NOT NULL,
+        document tsvector NOT NULL
+    )
+    """,
+    f"""
+    CREATE INDEX {SEARCH_TABLE}_document_idx
+    ON {SEARCH_TABLE} USING gin (document)
+    """,
+    f"""
+    CREATE INDEX {SEARCH_TABLE}_content_idx
+    ON {SEARCH_TABLE} USING gin (content gin_trgm_ops)
+    """,
+    f"""
+    INSERT INTO {SEARCH_TABLE} (equipment_id, content, document)
+    SELECT c.id, c.content, to_tsvector('simple', c.content)
+    FROM (
+        SELECT e.id, concat_ws(
+            ' ', e.label, e.serial_number, e.model_number, e.brand, t.name
+        ) AS content
+        FROM store_equipment e
+        INNER JOIN store_equipmenttype t ON t.id = e.equipment_type_id
+    ) c
+    """,
+]
+
+POSTGRESQL_CREATE_TRIGGERS = [
+    f"""
+    CREATE OR REPLACE FUNCTION {SEARCH_TABLE}_refresh() RETURNS trigger AS $$
+    BEGIN
+        IF TG_OP = 'DELETE' THEN
+            DELETE FROM {SEARCH_TABLE} WHERE equipment_id = OLD.id;
+            RETURN NULL;
+        END IF;
+
+        INSERT INTO {SEARCH_TABLE} (equipment_id, content, document)
+        SELECT NEW.id, c.content, to_tsvector('simple', c.content)
+        FROM (
+            SELECT concat_ws(
+                ' ', NEW.label, NEW.serial_number, NEW.model_number,
+                NEW.brand, t.name
+            ) AS content
+            FROM store_equipmenttype t WHERE t.id = NEW.equipment_type_id
+        ) c
+        ON CONFLICT (equipment_id) DO UPDATE
+        SET content = EXCLUDED.content, document = EXCLUDED.document;
+        RETURN NULL;
+    END
+    $$ LANGUAGE plpgsql
+    """,
+    f"""
+    CREATE OR REPLACE FUNCTION {SEARCH_TABLE}_type_refresh() RETURNS trigger AS $$
+    BEGIN
+        UPDATE {SEARCH_TABLE} s
+        SET content = c.content, document = to_tsvector('simple', c.content)
+        FROM (
+            SELECT e.id, concat_ws(
+                ' ', e.label, e.serial_number, e.model_number, e.brand, NEW.name
+            ) AS content
+            FROM store_equipment e WHERE e.equipment_type_id = NEW.id
+        ) c
+        WHERE s.equipment_id = c.id;
+        RETURN NULL;
+    END
+    $$ LANGUAGE plpgsql
+    """,
+    f"DROP TRIGGER IF EXISTS {SEARCH_TABLE}_refresh ON store_equipment",
+    f"""
+    CREATE TRIGGER {SEARCH_TABLE}_refresh
+    AFTER INSERT OR DELETE OR UPDATE OF
+        label, serial_number, model_number, brand, equipment_type_id
+    ON store_equipment
+    FOR EACH ROW EXECUTE FUNCTION {SEARCH_TABLE}_refresh()
+    """,
+    f"DROP TRIGGER IF EXISTS {SEARCH_TABLE}_type_refresh ON store_equipmenttype",
+    f"""
+    CREATE TRIGGER {SEARCH_TABLE}_type_refresh
+    AFTER UPDATE OF name ON store_equipmenttype
+    FOR EACH ROW EXECUTE FUNCTION {SEARCH_TABLE}_type_refresh()
+    """,
+]
+
+POSTGRESQL_DROP = [
+    f"DROP TRIGGER IF EXISTS {SEARCH_TABLE}_refresh ON store_equipment",
+    f"DROP TRIGGER IF EXISTS {SEARCH_TABLE}_type_refresh ON store_equipmenttype",
+    f"DROP FUNCTION IF EXISTS {SEARCH_TABLE}_refresh()",
+    f"DROP FUNCTION IF EXISTS {SEARCH_TABLE}_type_refresh()",
+    f"DROP TABLE IF EXISTS {SEARCH_TABLE}",
+]
+
+
+def drop_search_triggers(apps, schema_editor):
+    """
+    Drop triggers keeping the search index in sync with equipments.
+
+    SQLite rebuilds store_equipment for most schema changes and cannot do so
+    while triggers reference it, so such migrations drop the triggers first
+    and create them again afterwards.
+    """
+    vendor = schema_editor.connection.vendor
+
+    if vendor == "sqlite":
+        for statement in SQLITE_DROP[:4]:
+            schema_editor.execute(statement)
+    elif vendor == "postgresql":
+        for statement in POSTGRESQL_DROP[:2]:
+            schema_editor.execute(statement)
+
+
+def create_search_triggers(apps, schema_editor):
+    """
+    Create triggers keeping the search index in sync with equipments.
+    """
+    vendor = schema_editor.connection.vendor
+
+    drop_search_triggers(apps, schema_editor)
+
+    if vendor == "sqlite":
+        for statement in SQLITE_CREATE_TRIGGERS:
+            schema_editor.execute(statement)
+    elif vendor == "postgresql":
+        for statement in POSTGRESQL_CREATE_TRIGGERS:
+            schema_editor.execute(statement)
+
+
+def create_search_index(apps, schema_editor):
+    """
+    Create and fill the search index.
+    """
+    vendor = schema_editor.connection.vendor
+
+    if vendor == "sqlite":
+        for statement in SQLITE_CREATE_TABLE:
+            schema_editor.execute(statement)
+    elif vendor == "postgresql":
+        for statement in POSTGRESQL_CREATE_TABLE:
+            schema_editor.execute(statement)
+
+    create_search_triggers(apps, schema_editor)
+
+
+def drop_search_index(apps, schema_editor):
+    """
+    Drop the search index.
+    """
+    vendor = schema_editor.connection.vendor
+
+    if vendor == "sqlite":
+        for statement in SQLITE_DROP:
+            schema_editor.execute(statement)
+    elif vendor == "postgresql":
+        for statement in POSTGRESQL_DROP:
+            schema_editor.execute(statement)
+
+
+def search_equipments(queryset, search):
+    """
+    Filter equipments by search text, best matches first.
+
+    An equipment matches when every term prefixes one of its words or when
+    the whole text is part of its fields, on every database.
+    """
+    terms = re.findall(r"\w+", search)
+
+    if not terms:
+        return queryset.order_by("-pk")
+
+    pattern = "%" + re.sub(r"([\\%_])", r"\\\1", search.strip()) + "%"
+
+    if connection.vendor == "sqlite":
+        match = " ".join(f'"{term}"*' for term in terms)
+        content = " || ' ' || ".join(
+            f"{SEARCH_TABLE}.{column}"
+            for column in (
+                "label",
+                "serial_number",
+                "model_number",
+                "brand",
+                "type_name",
+            )
+        )
+        # FTS5 refuses MATCH under OR, so each condition has its own query.
+        matches = RawSQL(
+            f"""
+            EXISTS (
+                SELECT 1 FROM {SEARCH_TABLE}
+                WHERE {SEARCH_TABLE} MATCH %s
+                AND {SEARCH_TABLE}.rowid = store_equipment.id
+            ) OR EXISTS (
+                SELECT 1 FROM {SEARCH_TABLE}
+                WHERE {SEARCH_TABLE}.rowid = store_equipment.id
+                AND {content} LIKE %s ESCAPE '\\'
+            )
+            """,
+            [match, pattern],
+            output_field=BooleanField(),
+        )
+        rank = RawSQL(
+            f"""
+            SELECT bm25({SEARCH_TABLE}) FROM {SEARCH_TABLE}
+            WHERE {SEARCH_TABLE} MATCH %s
+            AND {SEARCH_TABLE}.rowid = store_equipment.id
+            """,
+            [match],
+            output_field=FloatField(),
+        )
+        return (
+            queryset.filter(matches)
+            .annotate(search_rank=rank)
+            .order_by(F("search_rank").asc(nulls_last=True), "-pk")
+        )
+
+    if connection.vendor == "postgresql":
+        match = " & ".join(f"{term}:*" for term in terms)
+        matches = RawSQL(
+            f"""
+            EXISTS (
+                SELECT 1 FROM {SEARCH_TABLE} s
+                WHERE s.equipment_id = store_equipment.id
+                AND (
+                    s.document @@ to_tsquery('simple', %s) OR s.content ILIKE %s
+                )
+            )
+            """,
+            [match, pattern],
+            output_field=BooleanField(),
+        )
+        rank = RawSQL(
+            f"""
+            SELECT ts_rank(s.document, to_tsquery('simple', %s))
+            FROM {SEARCH_TABLE} s WHERE s.equipment_id = store_equipment.id
+            """,
+            [match],
+            output_field=FloatField(),
+        )
+        return (
+            queryset.filter(matches)
+            .annotate(search_rank=rank)
+            .order_by(F("search_rank").desc(nulls_last=True), "-pk")
+        )
+
+    return queryset.filter(
+        Q(label__icontains=search)
+        | Q(equipment_type__name__icontains=search)
+        | Q(serial_number__icontains=search)
+        | Q(model_number__icontains=search)
+        | Q(brand__icontains=search)
+    ).order_by("-pk")
@@ -1,3 +1,948 @@
 """
     Module name :- tests.
 """
+
+import json
+import tempfile
+from datetime import timedelta
+import threading
+from io import StringIO
+from pathlib import Path
+
+from django.contrib.auth.models import User
+from django.core.management import call_command
+from django.core.exceptions import ValidationError
+from django.db import connection
+from django.template import engines
+from django.test import Client, TestCase, TransactionTestCase
+from django.urls import reverse
+from django.utils import timezone
+from monitoring.nplusone import NPlusOneError
+from monitoring.testing import NPlusOneTestMixin
+from store.models import (
+    MAX_LABEL_NUMBER,
+    Allocation,
+    AllocationArchive,
+    ArchiveError,
+    Equipment,
+    EquipmentType,
+    LabelSequence,
+)
+from store.bulk import apply_allocation_operations
+from store.forms import AddEquipmentForm
+from store.search import search_equipments
+from store.transitions import TransitionError, allocate, change_status
+
+
+def create_equipment(equipment_type, **fields):
+    """
+    Create a labelled equipment of a type.
+    """
+    fields = {
+        "serial_number": "SN-1",
+        "model_number": "MN-1",
+        "brand": "Brand",
+        "price": 1000,
+        "buy_date": "2024-01-01",
+        **fields,
+    }
+    equipment = Equipment(equipment_type=equipment_type, **fields)
+    equipment.set_label()
+    equipment.save()
+    return equipment
+
+
+class ConcurrentAllocationTest(TransactionTestCase):
+    """
+    Parallel allocation attempts of the same equipment.
+    """
+
+    clerks = 8
+
+    def setUp(self):
+        """
+        Create an equipment and logged in clients of several clerks.
+        """
+        equipment_type = EquipmentType.objects.create(name="Laptop")
+        self.equipment = create_equipment(equipment_type)
+
+        self.clients = []
+        for number in range(self.clerks):
+            user = User.objects.create_user(f"clerk{number}", password="password")
+            client = Client()
+            client.force_login(user)
+            self.clients.append((client, user))
+
+    def allocate(self, client, user):
+        """
+        Post an allocation of the equipment to the user.
+        """
+        return client.post(
+            reverse("store:create-allocation"),
+            {
+                "equipment_type": self.equipment.equipment_type_id,
+                "equipment": self.equipment.pk,
+                "user": user.pk,
+            },
+        )
+
+    def test_parallel_allocations_keep_one_open_allocation(self):
+        """
+        Only one of the parallel allocations succeeds, others get form errors.
+        """
+        barrier = threading.Barrier(self.clerks)
+        responses = []
+
+        def attempt(client, user):
+            barrier.wait()
+            try:
+                responses.append(self.allocate(client, user))
+            finally:
+                connection.close()
+
+        threads = [
+            threading.Thread(target=attempt, args=client_user)
+            for client_user in self.clients
+        ]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        self.assertEqual(len(responses), self.clerks)
+        self.assertEqual(
+            sorted(response.status_code for response in responses),
+            [200] * (self.clerks - 1) + [302],
+        )
+        for response in responses:
+            if response.status_code == 200:
+                errors = [
+                    error
+                    for field_errors in response.context["form"].errors.values()
+                    for error in field_errors
+                ]
+                self.assertTrue(errors)
+                self.assertLessEqual(
+                    set(errors),
+                    {"Equipment is not available.", "Equipment is already allocated."},
+                )
+
+        allocation = Allocation.objects.get(returned=False)
+        self.equipment.refresh_from_db()
+        self.assertEqual(self.equipment.current_user_id, allocation.user_id)
+
+    def test_allocation_after_return_succeeds(self):
+        """
+        Returned allocations do not block new allocations.
+        """
+        (first_client, first_user), (second_client, second_user) = self.clients[:2]
+
+        self.assertEqual(self.allocate(first_client, first_user).status_code, 302)
+        self.assertContains(
+            self.allocate(second_client, second_user),
+            "Equipment is not available.",
+        )
+
+        change_status([self.equipment.pk], Equipment.Status.AVAILABLE)
+        self.assertEqual(self.allocate(second_client, second_user).status_code, 302)
+        self.assertEqual(Allocation.objects.get(returned=False).user_id, second_user.pk)
+
+
+class ChangeStatusTest(TestCase):
+    """
+    Status changes of allocated equipments.
+    """
+
+    def setUp(self):
+        """
+        Create an equipment allocated to a user.
+        """
+        self.equipment_type = EquipmentType.objects.create(name="Laptop")
+        self.equipment = create_equipment(self.equipment_type)
+        self.user = User.objects.create_user("clerk", password="password")
+        self.allocation = allocate(self.equipment, self.user)
+
+    def test_allocated_equipment_moves_out_of_service(self):
+        """
+        Moving an allocated equipment closes its allocation and frees it.
+        """
+        for status in (Equipment.Status.UNDER_REPAIR, Equipment.Status.RETIRED):
+            with self.subTest(status=status):
+                version = EquipmentType.objects.get(pk=self.equipment_type.pk).version
+
+                self.assertEqual(change_status([self.equipment.pk], status), 1)
+
+                self.equipment.refresh_from_db()
+                self.allocation.refresh_from_db()
+                self.assertEqual(self.equipment.status, status)
+                self.assertIsNone(self.equipment.current_user)
+                self.assertTrue(self.allocation.returned)
+                self.assertIsNotNone(self.allocation.returned_at)
+                self.assertFalse(Allocation.objects.filter(returned=False).exists())
+                self.assertEqual(
+                    EquipmentType.objects.get(pk=self.equipment_type.pk).version,
+                    version + 1,
+                )
+                with self.assertRaisesMessage(
+                    TransitionError, "Equipment is not available."
+                ):
+                    allocate(self.equipment, self.user)
+
+                change_status([self.equipment.pk], Equipment.Status.AVAILABLE)
+                self.allocation = allocate(self.equipment, self.user)
+
+    def test_allocated_equipment_is_returned_to_available(self):
+        """
+        Moving an allocated equipment to available closes its allocation.
+        """
+        self.assertEqual(
+            change_status([self.equipment.pk], Equipment.Status.AVAILABLE), 1
+        )
+        self.equipment.refresh_from_db()
+        self.assertEqual(self.equipment.status, Equipment.Status.AVAILABLE)
+        self.assertIsNone(self.equipment.current_user)
+        self.assertFalse(Allocation.objects.filter(returned=False).exists())
+
+    def test_disallowed_source_is_skipped(self):
+        """
+        Equipments not in an allowed source status are left alone.
+        """
+        change_status([self.equipment.pk], Equipment.Status.RETIRED)
+
+        self.assertEqual(
+            change_status([self.equipment.pk], Equipment.Status.UNDER_REPAIR), 0
+        )
+        self.equipment.refresh_from_db()
+        self.assertEqual(self.equipment.status, Equipment.Status.RETIRED)
+
+    def test_holder_of_same_moment_allocations_is_latest(self):
+        """
+        Allocations made at the same moment resolve to the last one made.
+        """
+        change_status([self.equipment.pk], Equipment.Status.AVAILABLE)
+        second_user = User.objects.create_user("second", password="password")
+        second = allocate(self.equipment, second_user)
+        Allocation.objects.filter(pk=second.pk).update(
+            allocated_at=self.allocation.allocated_at
+        )
+
+        holder = Allocation.get_holder_at(self.equipment, self.allocation.allocated_at)
+        self.assertEqual(holder.pk, second.pk)
+
+
+class UpdateAllocationTest(TestCase):
+    """
+    Allocation edits that open or move allocations.
+    """
+
+    def setUp(self):
+        """
+        Create two equipments, allocate one to a user, and log in.
+        """
+        self.equipment_type = EquipmentType.objects.create(name="Laptop")
+        self.equipment = create_equipment(self.equipment_type)
+        self.other = create_equipment(self.equipment_type, serial_number="SN-2")
+        self.user = User.objects.create_user("clerk", password="password")
+        self.allocation = allocate(self.equipment, self.user)
+        self.client.force_login(self.user)
+
+    def update(self, allocation, equipment, returned=False):
+        """
+        Post the update allocation form.
+        """
+        data = {"user": self.user.pk, "equipment": equipment.pk}
+        if returned:
+            data["returned"] = "on"
+        return self.client.post(
+            reverse("store:update-allocation", args=[allocation.pk]), data
+        )
+
+    def test_retired_equipment_cannot_be_reopened(self):
+        """
+        Reopening an allocation of a retired equipment is refused.
+        """
+        change_status([self.equipment.pk], Equipment.Status.RETIRED)
+
+        response = self.update(self.allocation, self.equipment)
+
+        self.assertContains(response, "Equipment is not available.")
+        self.equipment.refresh_from_db()
+        self.assertEqual(self.equipment.status, Equipment.Status.RETIRED)
+        self.assertIsNone(self.equipment.current_user)
+        self.assertFalse(Allocation.objects.filter(returned=False).exists())
+
+    def test_reopening_allocates_from_now(self):
+        """
+        A reopened allocation starts a new allocation and keeps the gap.
+        """
+        change_status([self.equipment.pk], Equipment.Status.AVAILABLE)
+        self.allocation.refresh_from_db()
+
+        self.assertEqual(self.update(self.allocation, self.equipment).status_code, 302)
+
+        reopened = Allocation.objects.get(returned=False)
+        self.assertNotEqual(reopened.pk, self.allocation.pk)
+        self.assertGreater(reopened.allocated_at, self.allocation.returned_at)
+        self.allocation.refresh_from_db()
+        self.assertTrue(self.allocation.returned)
+        self.equipment.refresh_from_db()
+        self.assertEqual(self.equipment.status, Equipment.Status.ALLOCATED)
+        self.assertEqual(self.equipment.current_user, self.user)
+
+    def test_open_allocation_moves_to_available_equipment_only(self):
+        """
+        Moving an open allocation returns it and allocates the target.
+        """
+        change_status([self.other.pk], Equipment.Status.UNDER_REPAIR)
+        response = self.update(self.allocation, self.other)
+        self.assertContains(response, "Equipment is not available.")
+
+        change_status([self.other.pk], Equipment.Status.AVAILABLE)
+        self.assertEqual(self.update(self.allocation, self.other).status_code, 302)
+
+        self.allocation.refresh_from_db()
+        self.assertTrue(self.allocation.returned)
+        self.assertEqual(self.allocation.equipment, self.equipment)
+        moved = Allocation.objects.get(returned=False)
+        self.assertEqual(moved.equipment, self.other)
+        self.equipment.refresh_from_db()
+        self.other.refresh_from_db()
+        self.assertEqual(self.equipment.status, Equipment.Status.AVAILABLE)
+        self.assertIsNone(self.equipment.current_user)
+        self.assertEqual(self.other.status, Equipment.Status.ALLOCATED)
+        self.assertEqual(self.other.current_user, self.user)
+
+    def test_admin_cannot_open_allocation_of_retired_equipment(self):
+        """
+        The admin refuses open allocations of equipments out of service.
+        """
+        change_status([self.equipment.pk], Equipment.Status.RETIRED)
+        self.client.force_login(
+            User.objects.create_superuser("admin", password="password")
+        )
+
+        url = reverse("admin:store_allocation_add")
+        data = {
+            "user": self.user.pk,
+            "equipment": self.equipment.pk,
+            "allocated_at_0": "2024-01-01",
+            "allocated_at_1": "00:00:00",
+        }
+
+        response = self.client.post(url, data)
+        self.assertContains(response, "Equipment is not available.")
+        self.assertFalse(Allocation.objects.filter(returned=False).exists())
+
+        response = self.client.post(url, {**data, "equipment": self.other.pk})
+        self.assertEqual(response.status_code, 302)
+        self.other.refresh_from_db()
+        self.assertEqual(self.other.current_user, self.user)
+
+    def test_admin_bulk_delete_frees_equipments(self):
+        """
+        Deleting selected allocations in the admin frees their equipments.
+        """
+        self.client.force_login(
+            User.objects.create_superuser("admin", password="password")
+        )
+
+        self.client.post(
+            reverse("admin:store_allocation_changelist"),
+            {
+                "action": "delete_selected",
+                "_selected_action": [self.allocation.pk],
+                "post": "yes",
+            },
+        )
+
+        self.assertFalse(Allocation.objects.exists())
+        self.equipment.refresh_from_db()
+        self.assertEqual(self.equipment.status, Equipment.Status.AVAILABLE)
+        self.assertIsNone(self.equipment.current_user)
+        allocate(self.equipment, self.user)
+
+
+class LabelSequenceTest(TestCase):
+    """
+    Label number reservation.
+    """
+
+    def test_exhausted_sequence_reserves_nothing(self):
+        """
+        Blocks past the last six digit number are refused.
+        """
+        equipment_type = EquipmentType.objects.create(name="Laptop")
+        LabelSequence.objects.create(prefix="Lap", last_value=MAX_LABEL_NUMBER - 1)
+
+        self.assertEqual(equipment_type.reserve_labels(), ["Lap-999999"])
+        with self.assertRaisesMessage(ValidationError, "No labels left for Lap"):
+            equipment_type.reserve_labels(2)
+        self.assertEqual(LabelSequence.get_last_value("Lap"), MAX_LABEL_NUMBER)
+
+    def test_types_with_same_prefix_share_the_sequence(self):
+        """
+        Types whose names start alike get distinct labels.
+        """
+        labels = []
+        for name in ("Keyboard", "Keypad", "Keyboard"):
+            equipment_type = EquipmentType.objects.get_or_create(name=name)[0]
+            form = AddEquipmentForm(
+                data={
+                    "label": equipment_type.get_next_label(),
+                    "equipment_type": equipment_type.pk,
+                    "serial_number": "SN-1",
+                    "model_number": "MN-1",
+                    "brand": "Brand",
+                    "price": 1000,
+                    "buy_date": "2024-01-01",
+                }
+            )
+            self.assertTrue(form.is_valid(), form.errors)
+            labels.append(form.save().label)
+
+        self.assertEqual(labels, ["Key-000001", "Key-000002", "Key-000003"])
+
+
+class SearchEquipmentTest(TestCase):
+    """
+    Equipment search.
+    """
+
+    def setUp(self):
+        """
+        Create two equipments.
+        """
+        equipment_type = EquipmentType.objects.create(name="Laptop")
+        self.thinkpad = create_equipment(
+            equipment_type, brand="ThinkPad", model_number="T14"
+        )
+        self.latitude = create_equipment(
+            equipment_type, serial_number="SN-2", brand="Latitude", model_number="E5440"
+        )
+
+    def search(self, text):
+        """
+        Get the equipments found by a search.
+        """
+        return list(search_equipments(Equipment.objects.all(), text))
+
+    def test_words_are_found_by_prefix(self):
+        """
+        Every term has to start a word of the equipment.
+        """
+        self.assertEqual(self.search("think"), [self.thinkpad])
+        self.assertEqual(self.search("lati e54"), [self.latitude])
+        self.assertEqual(self.search("lap"), [self.latitude, self.thinkpad])
+
+    def test_text_is_found_inside_words(self):
+        """
+        The whole text is found anywhere in the fields, as with icontains.
+        """
+        self.assertEqual(self.search("inkpa"), [self.thinkpad])
+        self.assertEqual(self.search("5440"), [self.latitude])
+        self.assertEqual(self.search("N_1"), [])
+
+    def test_labels_are_found(self):
+        """
+        Labels are found whole, by number, or by part.
+        """
+        self.assertEqual(self.search(self.thinkpad.label), [self.thinkpad])
+        self.assertEqual(self.search(self.latitude.label[-6:]), [self.latitude])
+        self.assertEqual(self.search("p-00000"), [self.latitude, self.thinkpad])
+
+
+class ImportEquipmentTest(TestCase):
+    """
+    Equipment import command.
+    """
+
+    header = "equipment_type,serial_number,model_number,brand,price,buy_date\n"
+
+    def import_rows(self, rows, *args):
+        """
+        Import CSV rows and get rejected rows and errors.
+        """
+        with tempfile.TemporaryDirectory() as directory:
+            path = Path(directory) / "equipments.csv"
+            reject_path = Path(directory) / "rejected.csv"
+            path.write_text(self.header + "".join(rows), encoding="utf-8")
+            call_command(
+                "import_equipment",
+                str(path),
+                "--reject-file",
+                str(reject_path),
+                *args,
+                stdout=StringIO(),
+            )
+            return reject_path.read_text(encoding="utf-8").splitlines()[1:]
+
+    def test_upsert_merges_repeated_serial_numbers(self):
+        """
+        The last row of a serial number repeated in a batch wins.
+        """
+        EquipmentType.objects.create(name="Laptop")
+
+        self.import_rows(
+            [
+                "Laptop,SN-1,MN-1,Brand,1000,2024-01-01\n",
+                "Laptop,SN-1,MN-2,Brand,1200,2024-01-01\n",
+            ],
+            "--upsert",
+        )
+        self.assertEqual(
+            list(Equipment.objects.values_list("serial_number", "model_number")),
+            [("SN-1", "MN-2")],
+        )
+
+        self.import_rows(
+            [
+                "Laptop,SN-1,MN-3,Brand,1000,2024-01-01\n",
+                "Laptop,SN-1,MN-4,Brand,1200,2024-01-01\n",
+            ],
+            "--upsert",
+        )
+        self.assertEqual(
+            list(Equipment.objects.values_list("serial_number", "model_number")),
+            [("SN-1", "MN-4")],
+        )
+
+    def test_long_equipment_type_name_is_rejected(self):
+        """
+        Type names longer than the name field are row errors.
+        """
+        name = "L" * 51
+
+        rejected = self.import_rows(
+            [f"{name},SN-1,MN-1,Brand,1000,2024-01-01\n"], "--create-types"
+        )
+        self.assertEqual(len(rejected), 1)
+        self.assertIn("at most 50 characters", rejected[0])
+        self.assertFalse(EquipmentType.objects.exists())
+
+
+class BulkAllocationTest(TestCase):
+    """
+    Allocation operations applied in bulk.
+    """
+
+    def setUp(self):
+        """
+        Create two equipments, allocate one, and log in.
+        """
+        equipment_type = EquipmentType.objects.create(name="Laptop")
+        self.equipment = create_equipment(equipment_type)
+        self.other = create_equipment(equipment_type, serial_number="SN-2")
+        self.alice = User.objects.create_user("alice", password="password")
+        self.bob = User.objects.create_user("bob", password="password")
+        allocate(self.equipment, self.alice)
+        self.client.force_login(self.alice)
+
+    def get_holders(self):
+        """
+        Get the users of open allocations and the closed allocations by label.
+        """
+        return {
+            equipment.label: (
+                equipment.current_user and equipment.current_user.username,
+                list(
+                    equipment.allocation.filter(returned=True).values_list(
+                        "user__username", flat=True
+                    )
+                ),
+            )
+            for equipment in Equipment.objects.select_related("current_user")
+        }
+
+    def test_transfer_returns_and_allocates(self):
+        """
+        A transfer closes the allocation of the holder and opens one.
+        """
+        results = apply_allocation_operations(
+            [{"action": "transfer", "label": self.equipment.label, "user": "bob"}]
+        )
+
+        self.assertEqual(results[0]["status"], "ok")
+        self.assertEqual(
+            self.get_holders(),
+            {self.equipment.label: ("bob", ["alice"]), self.other.label: (None, [])},
+        )
+        self.equipment.refresh_from_db()
+        self.assertEqual(self.equipment.status, Equipment.Status.ALLOCATED)
+
+    def test_return_then_allocate_the_same_equipment(self):
+        """
+        Operations on one equipment apply in order within a batch.
+        """
+        results = apply_allocation_operations(
+            [
+                {"action": "return", "label": self.equipment.label},
+                {"action": "allocate", "label": self.equipment.label, "user": "bob"},
+                {"action": "allocate", "label": self.other.label, "user": "alice"},
+                {"action": "return", "label": self.other.label},
+            ]
+        )
+
+        self.assertEqual([result["status"] for result in results], ["ok"] * 4)
+        self.assertEqual(
+            self.get_holders(),
+            {
+                self.equipment.label: ("bob", ["alice"]),
+                self.other.label: (None, ["alice"]),
+            },
+        )
+        self.other.refresh_from_db()
+        self.assertEqual(self.other.status, Equipment.Status.AVAILABLE)
+
+    def test_invalid_operations_fail_alone(self):
+        """
+        Invalid operations are reported and the others still apply.
+        """
+        change_status([self.other.pk], Equipment.Status.UNDER_REPAIR)
+        label = self.equipment.label
+
+        results = apply_allocation_operations(
+            [
+                {"action": "lend", "label": label, "user": "bob"},
+                {"action": "allocate", "label": "Lap-999999", "user": "bob"},
+                {"action": "transfer", "label": label, "user": "carol"},
+                {"action": "allocate", "label": label, "user": "bob"},
+                {"action": "transfer", "label": label, "user": "alice"},
+                {"action": "allocate", "label": self.other.label, "user": "bob"},
+                {"action": "return", "label": self.other.label},
+                "return",
+                {"action": "return", "label": label},
+            ]
+        )
+
+        self.assertEqual(
+            [result.get("error") for result in results],
+            [
+                "Unknown action.",
+                "Unknown equipment.",
+                "Unknown user.",
+                "Equipment is already allocated.",
+                "Equipment is already allocated to this user.",
+                "Equipment is not available.",
+                "Equipment is not allocated.",
+                "Unknown action.",
+                None,
+            ],
+        )
+        self.assertEqual(
+            self.get_holders(),
+            {self.equipment.label: (None, ["alice"]), self.other.label: (None, [])},
+        )
+
+    def test_view_applies_posted_operations(self):
+        """
+        The view applies JSON operations and refuses malformed bodies.
+        """
+        url = reverse("store:bulk-allocation")
+
+        for body in ("not json", '{"operations": {}}', "[]"):
+            with self.subTest(body=body):
+                response = self.client.post(url, body, "application/json")
+                self.assertEqual(response.status_code, 400)
+
+        response = self.client.post(
+            url,
+            {
+                "operations": [
+                    {
+                        "action": "transfer",
+                        "label": self.equipment.label,
+                        "user": "bob",
+                    },
+                    {"action": "return", "label": self.other.label},
+                ]
+            },
+            "application/json",
+        )
+
+        self.assertEqual(
+            [result["status"] for result in response.json()["results"]],
+            ["ok", "error"],
+        )
+        self.assertEqual(self.get_holders()[self.equipment.label], ("bob", ["alice"]))
+
+    def test_command_applies_operations_from_file(self):
+        """
+        The command applies JSON lines and prints every result.
+        """
+        operations = [
+            {"action": "return", "label": self.equipment.label},
+            {"action": "allocate", "label": self.equipment.label, "user": "bob"},
+            {"action": "allocate", "label": self.other.label, "user": "carol"},
+        ]
+        stdout = StringIO()
+
+        with tempfile.TemporaryDirectory() as directory:
+            path = Path(directory) / "operations.jsonl"
+            path.write_text(
+                "".join(json.dumps(operation) + "\n" for operation in operations),
+                encoding="utf-8",
+            )
+            call_command("bulk_allocate", str(path), stdout=stdout)
+
+        lines = stdout.getvalue().splitlines()
+        self.assertEqual(
+            [json.loads(line)["status"] for line in lines[:-1]], ["ok", "ok", "error"]
+        )
+        self.assertIn("Applied 2 operations, 1 failed.", lines[-1])
+        self.assertEqual(self.get_holders()[self.equipment.label], ("bob", ["alice"]))
+
+
+class EquipmentVersionTest(TestCase):
+    """
+    Equipment type versions behind conditional get_ids requests.
+    """
+
+    def setUp(self):
+        """
+        Create an equipment and log in a superuser.
+        """
+        self.equipment_type = EquipmentType.objects.create(name="Laptop")
+        self.equipment = create_equipment(self.equipment_type)
+        self.client.force_login(
+            User.objects.create_superuser("admin", password="password")
+        )
+
+    def get_version(self):
+        """
+        Get the stored version of the equipment type.
+        """
+        return EquipmentType.objects.get(pk=self.equipment_type.pk).version
+
+    def test_admin_delete_bumps_version(self):
+        """
+        Deleting equipments in the admin bumps the version.
+        """
+        version = self.get_version()
+
+        self.client.post(
+            reverse("admin:store_equipment_changelist"),
+            {
+                "action": "delete_selected",
+                "_selected_action": [self.equipment.pk],
+                "post": "yes",
+            },
+        )
+        self.assertFalse(Equipment.objects.exists())
+        self.assertEqual(self.get_version(), version + 1)
+
+    def test_etags_are_compared_exactly(self):
+        """
+        Only an exact ETag of the current version gets a 304.
+        """
+        EquipmentType.objects.filter(pk=self.equipment_type.pk).update(version=10)
+        url = reverse("store:get_ids") + f"?equipment_type={self.equipment_type.pk}"
+        pk = self.equipment_type.pk
+
+        for if_none_match, status_code in (
+            (f'"{pk}-1"', 200),
+            (f'W/"{pk}-10"', 304),
+            (f'"other", "{pk}-10"', 304),
+            ("*", 304),
+        ):
+            with self.subTest(if_none_match=if_none_match):
+                response = self.client.get(url, HTTP_IF_NONE_MATCH=if_none_match)
+                self.assertEqual(response.status_code, status_code)
+
+
+class AllocationArchiveTest(TestCase):
+    """
+    Archiving returned allocations and reading them back.
+    """
+
+    def setUp(self):
+        """
+        Create an equipment with a returned and an open allocation.
+        """
+        equipment_type = EquipmentType.objects.create(name="Laptop")
+        self.equipment = create_equipment(equipment_type)
+        self.user = User.objects.create_user("clerk", password="password")
+
+        self.returned = allocate(self.equipment, self.user)
+        change_status([self.equipment.pk], Equipment.Status.AVAILABLE)
+        self.returned.refresh_from_db()
+        self.open = allocate(self.equipment, self.user)
+
+    def test_archive_moves_returned_allocations(self):
+        """
+        Allocations returned before the cutoff move to the archive.
+        """
+        self.assertEqual(AllocationArchive.archive(timezone.now()), 1)
+
+        self.assertEqual(
+            list(Allocation.objects.values_list("pk", flat=True)), [self.open.pk]
+        )
+        archived = AllocationArchive.objects.get()
+        self.assertEqual(archived.pk, self.returned.pk)
+        self.assertEqual(archived.allocated_at, self.returned.allocated_at)
+        self.assertEqual(archived.returned_at, self.returned.returned_at)
+        self.assertEqual(AllocationArchive.archive(timezone.now()), 0)
+
+    def test_archive_is_append_only(self):
+        """
+        Archived allocations cannot be changed or deleted.
+        """
+        AllocationArchive.archive(timezone.now())
+        archived = AllocationArchive.objects.get()
+
+        with self.assertRaises(ArchiveError):
+            archived.save()
+        with self.assertRaises(ArchiveError):
+            archived.delete()
+        with self.assertRaises(ArchiveError):
+            AllocationArchive.objects.all().delete()
+        with self.assertRaises(ArchiveError):
+            AllocationArchive.objects.update(returned_at=timezone.now())
+        self.assertEqual(AllocationArchive.objects.count(), 1)
+
+        self.equipment.delete()
+        self.assertFalse(AllocationArchive.objects.exists())
+
+    def test_outstanding_at_includes_archived_allocations(self):
+        """
+        Allocations open at a moment are found in both tables.
+        """
+        AllocationArchive.archive(timezone.now())
+        moments = {
+            self.returned.pk: self.returned.allocated_at,
+            self.open.pk: timezone.now(),
+        }
+
+        for pk, moment in moments.items():
+            with self.subTest(pk=pk):
+                self.assertEqual(
+                    list(Allocation.get_outstanding_at(moment, "id")), [{"id": pk}]
+                )
+        self.assertEqual(
+            list(
+                Allocation.get_outstanding_at(
+                    self.returned.allocated_at - timedelta(seconds=1), "id"
+                )
+            ),
+            [],
+        )
+
+    def test_export_history_includes_archived_allocations(self):
+        """
+        The history export lists archived and open allocations.
+        """
+        AllocationArchive.archive(timezone.now())
+        self.client.force_login(self.user)
+
+        response = self.client.get(
+            reverse("store:export-allocations", args=["jsonl"]) + "?history=1"
+        )
+        lines = b"".join(response.streaming_content).decode().splitlines()
+
+        self.assertEqual(len(lines), 2)
+        self.assertIn('"returned": true', lines[0])
+        self.assertIn('"returned": false', lines[1])
+
+
+class ViewQueryTest(NPlusOneTestMixin, TestCase):
+    """
+    List and detail views do not run queries per row.
+    """
+
+    @classmethod
+    def setUpTestData(cls):
+        """
+        Create equipment types with allocated equipments.
+        """
+        cls.admin = User.objects.create_superuser("admin", password="password")
+        users = [
+            User.objects.create_user(f"user{number}", password="password")
+            for number in range(5)
+        ]
+
+        for name in ("Laptop", "Monitor"):
+            equipment_type = EquipmentType.objects.create(name=name)
+            for number in range(10):
+                equipment = create_equipment(
+                    equipment_type,
+                    serial_number=f"SN-{number}",
+                    model_number=f"MN-{number}",
+                )
+                if number % 2:
+                    allocate(equipment, users[number % len(users)])
+
+        cls.equipment_type = equipment_type
+        cls.equipment = equipment
+        cls.user = users[0]
+
+    def setUp(self):
+        """
+        Log in as a superuser.
+        """
+        self.client.force_login(self.admin)
+
+    def test_views_do_not_query_per_row(self):
+        """
+        Every view runs a fixed number of queries.
+        """
+        name = self.equipment_type.name
+        urls = [
+            reverse("store:equipment-types"),
+            reverse("store:particular-equipments", args=[name, "working"]),
+            reverse("store:particular-equipments", args=[name, "assigned"]),
+            reverse("store:detail-equipment", args=[name, self.equipment.pk]),
+            reverse("store:equipment-history", args=[self.equipment.pk]),
+            reverse("store:allocations"),
+            reverse("store:search-allocation") + "?search=user",
+            reverse("store:search-equipment", args=[name]) + "?search=MON",
+            reverse("store:export-equipments", args=[name, "working", "csv"]),
+            reverse("store:export-allocations", args=["csv"]),
+            reverse("store:get_ids") + f"?equipment_type={self.equipment_type.pk}",
+            reverse("store:create-allocation"),
+            reverse("accounts:users"),
+            reverse("accounts:search-user") + "?search=user",
+        ]
+        for url in urls:
+            with self.subTest(url=url):
+                response = self.client.get(url)
+                self.assertEqual(response.status_code, 200)
+                if response.streaming:
+                    b"".join(response.streaming_content)
+
+    def test_cursor_pages_have_no_page_number(self):
+        """
+        Cursor paginated lists leave out the page number they do not have.
+        """
+        response = self.client.get(reverse("store:allocations"))
+
+        self.assertNotContains(response, '<li class="page-item"></li>')
+
+    def test_lazy_relation_in_loop_fails(self):
+        """
+        Loading a relation per row is reported with the relation.
+        """
+        with self.assertRaisesMessage(NPlusOneError, "lazy load of Allocation.user"):
+            with self.assertNoNPlusOne():
+                usernames = []
+                for allocation in Allocation.objects.all():
+                    usernames.append(allocation.user.username)
+
+    def test_zero_threshold_is_kept(self):
+        """
+        A threshold of 0 is used rather than the configured one.
+        """
+        with self.assertRaises(NPlusOneError):
+            with self.assertNoNPlusOne(threshold=0):
+                Equipment.objects.count()
+
+    def test_template_line_is_reported(self):
+        """
+        Queries run by a template loop are reported with the template line.
+        """
+        template = engines["django"].from_string(
+            "{% for equipment in equipments %}\n"
+            "{{ equipment.equipment_type.name }}\n"
+            "{% endfor %}"
+        )
+        with self.assertRaisesMessage(NPlusOneError, "line 2"):
+            with self.assertNoNPlusOne():
+                template.render({"equipments": Equipment.objects.all()})
@@ -0,0 +1,128 @@
+"""
+    Module name :- transitions
+"""
+
+from django.db import transaction
+from django.utils import timezone
+from monitoring.metrics import record_allocations
+from store.models import Allocation, Equipment, EquipmentType
+
+Status = Equipment.Status
+
+SOURCES = {
+    Status.AVAILABLE: [Status.ALLOCATED, Status.UNDER_REPAIR, Status.RETIRED],
+    Status.UNDER_REPAIR: [Status.AVAILABLE, Status.ALLOCATED],
+    Status.RETIRED: [Status.AVAILABLE, Status.ALLOCATED, Status.UNDER_REPAIR],
+}
+
+
+class TransitionError(Exception):
+    """
+    Equipment cannot move to the requested status.
+    """
+
+
+def change_status(equipments, status):
+    """
+    Move equipments to a status and close their open allocations.
+
+    ``equipments`` is a queryset or a list of primary keys. The equipments
+    allowed to move are locked first, so an allocation committed
+    concurrently is either closed here or fails its own guard afterwards.
+    Equipments changed concurrently to another status are skipped instead
+    of overwritten. Returns the number of moved equipments.
+    """
+    if status not in SOURCES:
+        raise TransitionError(f"Equipments cannot be changed to {status}.")
+
+    with transaction.atomic():
+        moved = list(
+            Equipment.objects.select_for_update()
+            .filter(pk__in=equipments, status__in=SOURCES[status])
+            .values_list("pk", "equipment_type")
+        )
+        if not moved:
+            return 0
+
+        pks = [pk for pk, _ in moved]
+        Equipment.objects.filter(pk__in=pks).update(status=status, current_user=None)
+        returned = Allocation.objects.filter(equipment__in=pks, returned=False).update(
+            returned=True, returned_at=timezone.now()
+        )
+        record_allocations(returned=returned)
+        EquipmentType.bump_versions({equipment_type for _, equipment_type in moved})
+        return len(pks)
+
+
+def allocate(equipment, user):
+    """
+    Allocate an available equipment to a user.
+    """
+    with transaction.atomic():
+        if not Equipment.objects.filter(
+            pk=equipment.pk, status=Status.AVAILABLE
+        ).update(status=Status.ALLOCATED, current_user=user):
+            raise TransitionError("Equipment is not available.")
+
+        allocation = Allocation.objects.create(equipment=equipment, user=user)
+        record_allocations(created=1)
+        EquipmentType.bump_versions([equipment.equipment_type_id])
+
+    return allocation
+
+
+def is_reallocation(stored, equipment_id, user_id, returned):
+    """
+    Check whether an allocation edit opens an allocation or moves an open one.
+
+    ``stored`` is the allocation as stored, or None for a new allocation.
+    """
+    return not returned and (
+        stored is None
+        or stored.returned
+        or stored.equipment_id != equipment_id
+        or stored.user_id != user_id
+    )
+
+
+def update_allocation(allocation):
+    """
+    Save an edited allocation and keep its equipments in step.
+
+    Reopening a returned allocation, or pointing an open one at another
+    equipment or user, returns the stored allocation and allocates the
+    target from now through allocate(), so the target must be available
+    and history keeps the time in between. Other edits are saved as they
+    are. Returns the allocation holding the result.
+    """
+    with transaction.atomic():
+        stored = None
+        if allocation.pk is not None:
+            stored = (
+                Allocation.objects.select_for_update()
+                .select_related("equipment")
+                .get(pk=allocation.pk)
+            )
+
+        if is_reallocation(
+            stored, allocation.equipment_id, allocation.user_id, allocation.returned
+        ):
+            if stored is not None and not stored.returned:
+                Allocation.objects.filter(pk=stored.pk).update(
+                    returned=True, returned_at=timezone.now()
+                )
+                Equipment.objects.filter(
+                    pk=stored.equipment_id, status=Status.ALLOCATED
+                ).update(status=Status.AVAILABLE, current_user=None)
+                record_allocations(returned=1)
+                EquipmentType.bump_versions([stored.equipment.equipment_type_id])
+            return allocate(allocation.equipment, allocation.user)
+
+        allocation.save()
+        allocation.equipment.sync_current_user()
+        if stored is not None:
+            if stored.equipment_id != allocation.equipment_id:
+                stored.equipment.sync_current_user()
+            if allocation.returned and not stored.returned:
+                record_allocations(returned=1)
+    return allocation
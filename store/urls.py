@@ -11,14 +11,20 @@ from store.views import (
     UpdateEquipment,
     DeleteEquipment,
     DetailEquipment,
+    EquipmentHistory,
     ListParticularEquipments,
+    BulkEquipmentStatus,
     CreateAllocation,
     UpdateAllocation,
     DeleteAllocation,
     ListAllocation,
+    ListAllocationAt,
     SearchEquipment,
     SearchEquipmentType,
     SearchAllocation,
+    ExportEquipments,
+    ExportAllocations,
+    BulkAllocation,
     get_ids,
     get_label,
 )
@@ -51,11 +57,26 @@ urlpatterns = [
         DetailEquipment.as_view(),
         name="detail-equipment",
     ),
+    path(
+        "detail-equipment/<int:pk>/history/",
+        EquipmentHistory.as_view(),
+        name="equipment-history",
+    ),
     path(
         "equipments/<str:equipment_type>/<str:filter>/",
         ListParticularEquipments.as_view(),
         name="particular-equipments",
     ),
+    path(
+        "equipments/<str:equipment_type>/<str:filter>/export/<str:export_format>/",
+        ExportEquipments.as_view(),
+        name="export-equipments",
+    ),
+    path(
+        "equipments/<str:equipment_type>/<str:filter>/bulk-status/",
+        BulkEquipmentStatus.as_view(),
+        name="bulk-equipment-status",
+    ),
     path("create-allocation/", CreateAllocation.as_view(), name="create-allocation"),
     path(
         "allocations/update-allocation/<int:pk>",
@@ -68,6 +89,13 @@ urlpatterns = [
         name="delete-allocation",
     ),
     path("allocations/", ListAllocation.as_view(), name="allocations"),
+    path("allocations/bulk/", BulkAllocation.as_view(), name="bulk-allocation"),
+    path("allocations/at/", ListAllocationAt.as_view(), name="allocations-at"),
+    path(
+        "allocations/export/<str:export_format>/",
+        ExportAllocations.as_view(),
+        name="export-allocations",
+    ),
     path(
         "search-equipment/<str:equipment_type>/",
         SearchEquipment.as_view(),
@@ -2,27 +2,50 @@
     Module name :- views
 """
 
-from django.http import JsonResponse
-from django.urls import reverse_lazy
+import json
+
+from django.core.cache import cache
+from django.contrib import messages
+from django.http import (
+    Http404,
+    HttpResponse,
+    HttpResponseNotModified,
+    HttpResponseRedirect,
+    JsonResponse,
+)
+from django.shortcuts import get_object_or_404
+from django.urls import reverse, reverse_lazy
+from django.utils.http import parse_etags
 from django.views.generic import (
     ListView,
     DeleteView,
     CreateView,
     UpdateView,
     DetailView,
+    FormView,
+    View,
 )
 from django.contrib.messages.views import SuccessMessageMixin
-from django.db.models import Q
+from django.db import IntegrityError, transaction
 from django.contrib.auth.mixins import LoginRequiredMixin
+from store.bulk import apply_allocation_operations
+from store.exports import export_response
 from store.models import Equipment, EquipmentType, Allocation
+from store.pagination import CursorPaginationMixin
+from store.search import search_equipments
+from store.transitions import TransitionError, allocate, update_allocation
 from store.forms import (
     EquipmentTypeForm,
     AddEquipmentForm,
+    BulkStatusForm,
     UpdateEquipmentForm,
     CreateAllocationForm,
+    PointInTimeForm,
     UpdateAllocationForm,
 )
 
+GET_IDS_CACHE_TIMEOUT = 60 * 60
+
 
 # Create your views here.
 class ListEquipmentType(LoginRequiredMixin, ListView):
@@ -35,6 +58,12 @@ class ListEquipmentType(LoginRequiredMixin, ListView):
     context_object_name = "equipment_types"
     login_url = reverse_lazy("accounts:login")
 
+    def get_queryset(self):
+        """
+        Overridden get queryset method.
+        """
+        return self.model.get_equipment_counts()
+
 
 class CreateEquipmentType(LoginRequiredMixin, CreateView):
     """
@@ -76,7 +105,7 @@ class DeleteEquipmentType(LoginRequiredMixin, DeleteView):
         return context
 
 
-class ListParticularEquipments(LoginRequiredMixin, ListView):
+class ListParticularEquipments(LoginRequiredMixin, CursorPaginationMixin, ListView):
     """
     List particular equipments.
     """
@@ -90,35 +119,75 @@ class ListParticularEquipments(LoginRequiredMixin, ListView):
         """
         Overridden get queryset method.
         """
-        filtering = self.kwargs["filter"]
         equipment_type = EquipmentType.objects.get(name=self.kwargs["equipment_type"])
-
-        if filtering == "assigned":
-            query = self.model.get_assigned_equipments(equipment_type=equipment_type)[
-                ::-1
-            ]
-        elif filtering == "under_repair":
-            query = self.model.get_under_repair_equipments(
-                equipment_type=equipment_type
-            )[::-1]
-        else:
-            query = self.model.get_all_functional_equipments(
-                equipment_type=equipment_type
-            )[::-1]
-
-        return query
+        query = self.model.get_filtered_equipments(
+            equipment_type, self.kwargs["filter"]
+        )
+        return query.only("pk", "label")
 
     def get_context_data(self, **kwargs):
         """
         Get Context data.
         """
         context = super().get_context_data(**kwargs)
-        context["total"] = len(self.get_queryset())
+        context["total"] = (
+            context["paginator"].count
+            if context["paginator"]
+            else self.object_list.count()
+        )
         context["equipment_type"] = self.kwargs["equipment_type"]
         context["filter"] = self.kwargs["filter"]
         return context
 
 
+class BulkEquipmentStatus(LoginRequiredMixin, FormView):
+    """
+    Change the status of selected equipments.
+    """
+
+    form_class = BulkStatusForm
+    http_method_names = ["post"]
+    login_url = reverse_lazy("accounts:login")
+
+    def get_form_kwargs(self):
+        """
+        Limit the form to equipments of the listed type.
+        """
+        kwargs = super().get_form_kwargs()
+        kwargs["equipment_type"] = get_object_or_404(
+            EquipmentType, name=self.kwargs["equipment_type"]
+        )
+        return kwargs
+
+    def get_success_url(self):
+        """
+        Get back to the equipment list.
+        """
+        return reverse(
+            "store:particular-equipments",
+            kwargs={
+                "equipment_type": self.kwargs["equipment_type"],
+                "filter": self.kwargs["filter"],
+            },
+        )
+
+    def form_valid(self, form):
+        """
+        Change statuses and report the number of changed equipments.
+        """
+        count = form.save()
+        status = Equipment.Status(form.cleaned_data["status"])
+        messages.success(self.request, f"{count} equipments marked {status.label}.")
+        return super().form_valid(form)
+
+    def form_invalid(self, form):
+        """
+        Report errors on the equipment list.
+        """
+        messages.error(self.request, "Select equipments and an action.")
+        return HttpResponseRedirect(self.get_success_url())
+
+
 class CreateEquipment(LoginRequiredMixin, CreateView):
     """
     Create equipment.
@@ -180,6 +249,15 @@ class DeleteEquipment(LoginRequiredMixin, DeleteView):
     template_name = "store/delete.html"
     login_url = reverse_lazy("accounts:login")
 
+    def form_valid(self, form):
+        """
+        Delete equipment and bump version of its equipment type.
+        """
+        with transaction.atomic():
+            response = super().form_valid(form)
+            EquipmentType.bump_versions([self.object.equipment_type_id])
+        return response
+
     def get_context_data(self, **kwargs):
         """
         Get Context data.
@@ -216,10 +294,50 @@ class DetailEquipment(LoginRequiredMixin, DetailView):
         Get Context data.
         """
         context = super().get_context_data(**kwargs)
+        history, has_more = self.object.get_history()
+
         context["equipment_type"] = self.kwargs["equipment_type"]
+        context["history"] = history
+        context["has_more_history"] = has_more
+        context["current_user"] = (
+            history[0].user if history and not history[0].returned else None
+        )
         return context
 
 
+class EquipmentHistory(LoginRequiredMixin, View):
+    """
+    Older allocation history of an equipment.
+    """
+
+    login_url = reverse_lazy("accounts:login")
+
+    def get(self, request, *args, **kwargs):
+        """
+        Get a page of allocations older than the ``before`` allocation.
+        """
+        equipment = get_object_or_404(Equipment.objects.only("pk"), pk=kwargs["pk"])
+        try:
+            before = int(request.GET["before"]) if "before" in request.GET else None
+        except ValueError as error:
+            raise Http404("Invalid allocation.") from error
+
+        history, has_more = equipment.get_history(before=before)
+        return JsonResponse(
+            {
+                "results": [
+                    {
+                        "id": allocation.pk,
+                        "user": allocation.user.username,
+                        "returned": allocation.returned,
+                    }
+                    for allocation in history
+                ],
+                "before": history[-1].pk if has_more else None,
+            }
+        )
+
+
 class CreateAllocation(LoginRequiredMixin, SuccessMessageMixin, CreateView):
     """
     Create Allocation.
@@ -232,6 +350,24 @@ class CreateAllocation(LoginRequiredMixin, SuccessMessageMixin, CreateView):
     login_url = reverse_lazy("accounts:login")
     success_message = "Allocated"
 
+    def form_valid(self, form):
+        """
+        Save allocation and update current user of equipment.
+        """
+        try:
+            self.object = allocate(
+                form.cleaned_data["equipment"], form.cleaned_data["user"]
+            )
+        except TransitionError as error:
+            form.add_error("equipment", str(error))
+            return self.form_invalid(form)
+        except IntegrityError:
+            form.add_error("equipment", "Equipment is already allocated.")
+            return self.form_invalid(form)
+
+        messages.success(self.request, self.get_success_message(form.cleaned_data))
+        return HttpResponseRedirect(self.get_success_url())
+
     def get_context_data(self, **kwargs):
         """
         Get context data.
@@ -252,6 +388,20 @@ class UpdateAllocation(LoginRequiredMixin, UpdateView):
     login_url = reverse_lazy("acconts:login")
     success_url = reverse_lazy("store:allocations")
 
+    def form_valid(self, form):
+        """
+        Save allocation through the allocation transitions.
+        """
+        try:
+            self.object = update_allocation(form.instance)
+        except TransitionError as error:
+            form.add_error("equipment", str(error))
+            return self.form_invalid(form)
+        except IntegrityError:
+            form.add_error("equipment", "Equipment is already allocated.")
+            return self.form_invalid(form)
+        return HttpResponseRedirect(self.get_success_url())
+
     def get_context_data(self, **kwargs):
         """
         Get context data.
@@ -271,6 +421,17 @@ class DeleteAllocation(LoginRequiredMixin, DeleteView):
     success_url = reverse_lazy("store:allocations")
     login_url = reverse_lazy("accounts:login")
 
+    def form_valid(self, form):
+        """
+        Delete allocation and update current user of equipment.
+        """
+        equipment = self.object.equipment
+
+        with transaction.atomic():
+            response = super().form_valid(form)
+            equipment.sync_current_user()
+        return response
+
     def get_context_data(self, **kwargs):
         """
         Get context data.
@@ -280,7 +441,7 @@ class DeleteAllocation(LoginRequiredMixin, DeleteView):
         return context
 
 
-class ListAllocation(LoginRequiredMixin, ListView):
+class ListAllocation(LoginRequiredMixin, CursorPaginationMixin, ListView):
     """
     List Allocations.
     """
@@ -294,7 +455,55 @@ class ListAllocation(LoginRequiredMixin, ListView):
         """
         Overriding get_queryset().
         """
-        return self.model.get_non_returned_allocations()[::-1]
+        return self.model.select_list_columns(self.model.get_non_returned_allocations())
+
+
+class ListAllocationAt(LoginRequiredMixin, CursorPaginationMixin, ListView):
+    """
+    List allocations open at a moment.
+    """
+
+    model = Allocation
+    template_name = "store/list_allocation_at.html"
+    paginate_by = 25
+    cursor_field = None
+    login_url = reverse_lazy("accounts:login")
+    fields = ("id", "equipment__label", "user__username", "allocated_at", "returned_at")
+
+    def get_queryset(self):
+        """
+        Get allocations open at the moment, or the holder of one equipment.
+        """
+        self.form = PointInTimeForm(self.request.GET or None)
+        if not self.form.is_valid():
+            return self.model.objects.none().order_by("-id")
+
+        moment = self.form.cleaned_data["at"]
+        label = self.form.cleaned_data["label"]
+
+        if not label:
+            return self.model.get_outstanding_at(moment, *self.fields).order_by("-id")
+
+        holder = self.model.get_holder_at(
+            Equipment.objects.filter(label=label).values("pk")[:1], moment
+        )
+        if holder is None:
+            return self.model.objects.none().order_by("-id")
+        return (
+            type(holder)
+            .objects.filter(pk=holder.pk)
+            .values(*self.fields)
+            .order_by("-id")
+        )
+
+    def get_context_data(self, **kwargs):
+        """
+        Add lookup form and whether some allocation times are unknown.
+        """
+        context = super().get_context_data(**kwargs)
+        context["form"] = self.form
+        context["has_backfilled"] = self.form.is_bound and self.model.has_backfilled()
+        return context
 
 
 class SearchEquipmentType(LoginRequiredMixin, ListView):
@@ -312,10 +521,10 @@ class SearchEquipmentType(LoginRequiredMixin, ListView):
         Overridden get queryset method.
         """
         search = self.request.GET["search"]
-        return self.model.objects.filter(name__icontains=search)
+        return self.model.get_equipment_counts().filter(name__icontains=search)
 
 
-class SearchEquipment(LoginRequiredMixin, ListView):
+class SearchEquipment(LoginRequiredMixin, CursorPaginationMixin, ListView):
     """
     Search equipment.
     """
@@ -324,6 +533,7 @@ class SearchEquipment(LoginRequiredMixin, ListView):
     template_name = "store/list_equipment.html"
     context_object_name = "equipments"
     paginate_by = 25
+    cursor_field = None
     login_url = reverse_lazy('accounts"login')
 
     def get_queryset(self):
@@ -335,28 +545,24 @@ class SearchEquipment(LoginRequiredMixin, ListView):
 
         query = self.model.get_all_functional_equipments(equipment_type=equipment_type)
 
-        return query.filter(
-            Q(label__icontains=search)
-            | Q(equipment_type__name__icontains=search)
-            | Q(buy_date__icontains=search)
-            | Q(serial_number__icontains=search)
-            | Q(model_number__icontains=search)
-            | Q(price__icontains=search)
-            | Q(brand__icontains=search)
-        )[::-1]
+        return search_equipments(query.only("pk", "label"), search)
 
     def get_context_data(self, **kwargs):
         """
         Get Context data.
         """
         context = super().get_context_data(**kwargs)
-        context["total"] = len(self.get_queryset())
+        context["total"] = (
+            context["paginator"].count
+            if context["paginator"]
+            else self.object_list.count()
+        )
         context["equipment_type"] = self.kwargs["equipment_type"]
         context["search"] = self.request.GET["search"]
         return context
 
 
-class SearchAllocation(LoginRequiredMixin, ListView):
+class SearchAllocation(LoginRequiredMixin, CursorPaginationMixin, ListView):
     """
     Search equipment type.
     """
@@ -370,10 +576,8 @@ class SearchAllocation(LoginRequiredMixin, ListView):
         """
         Overridden get queryset method.
         """
-        search = self.request.GET["search"]
-        query = self.model.get_non_returned_allocations()
-        return query.filter(
-            Q(user__username__icontains=search) | Q(equipment__label__icontains=search)
+        return self.model.select_list_columns(
+            self.model.search_non_returned_allocations(self.request.GET["search"])
         )
 
     def get_context_data(self, **kwargs):
@@ -385,19 +589,164 @@ class SearchAllocation(LoginRequiredMixin, ListView):
         return context
 
 
+class ExportEquipments(LoginRequiredMixin, View):
+    """
+    Export particular equipments.
+    """
+
+    login_url = reverse_lazy("accounts:login")
+
+    def get(self, request, *args, **kwargs):
+        """
+        Stream equipments as CSV or JSONL.
+        """
+        equipment_type = EquipmentType.objects.get(name=self.kwargs["equipment_type"])
+        query = Equipment.get_filtered_equipments(
+            equipment_type, self.kwargs["filter"]
+        ).order_by("pk")
+
+        return export_response(
+            query,
+            header=[
+                "label",
+                "equipment_type",
+                "serial_number",
+                "model_number",
+                "brand",
+                "price",
+                "buy_date",
+                "status",
+                "current_user",
+            ],
+            fields=[
+                "label",
+                "equipment_type__name",
+                "serial_number",
+                "model_number",
+                "brand",
+                "price",
+                "buy_date",
+                "status",
+                "current_user__username",
+            ],
+            filename=f"{equipment_type.name}-{self.kwargs['filter']}",
+            export_format=self.kwargs["export_format"],
+        )
+
+
+class ExportAllocations(LoginRequiredMixin, View):
+    """
+    Export allocations.
+    """
+
+    login_url = reverse_lazy("accounts:login")
+
+    def get(self, request, *args, **kwargs):
+        """
+        Stream allocations as CSV or JSONL.
+
+        Open allocations are exported, or all allocations including the
+        archived ones with the ``history`` parameter.
+        """
+        fields = [
+            "equipment__label",
+            "equipment__equipment_type__name",
+            "user__username",
+            "returned",
+            "allocated_at",
+            "returned_at",
+        ]
+        search = request.GET.get("search")
+        if request.GET.get("history"):
+            query = Allocation.get_all_allocations(*fields).order_by("allocated_at")
+        elif search:
+            query = Allocation.search_non_returned_allocations(search).order_by("pk")
+        else:
+            query = Allocation.get_non_returned_allocations().order_by("pk")
+
+        return export_response(
+            query,
+            header=[
+                "equipment",
+                "equipment_type",
+                "user",
+                "returned",
+                "allocated_at",
+                "returned_at",
+            ],
+            fields=fields,
+            filename="allocations",
+            export_format=self.kwargs["export_format"],
+        )
+
+
+class BulkAllocation(LoginRequiredMixin, View):
+    """
+    Allocate, return and transfer equipments in bulk.
+    """
+
+    login_url = reverse_lazy("accounts:login")
+
+    def post(self, request, *args, **kwargs):
+        """
+        Apply operations posted as JSON.
+        """
+        try:
+            operations = json.loads(request.body)["operations"]
+        except (ValueError, KeyError, TypeError):
+            return JsonResponse({"error": "Invalid JSON body."}, status=400)
+
+        if not isinstance(operations, list):
+            return JsonResponse({"error": "Operations must be a list."}, status=400)
+
+        try:
+            results = apply_allocation_operations(operations)
+        except IntegrityError:
+            return JsonResponse(
+                {"error": "Equipment was allocated concurrently, try again."},
+                status=409,
+            )
+        return JsonResponse({"results": results})
+
+
 def get_ids(request):
     """
     Get ids.
     """
-    equipments = Equipment.get_ids(request.GET["equipment_type"])
-    return JsonResponse(list(equipments), safe=False)
+    equipment_type = request.GET["equipment_type"]
+    version = (
+        EquipmentType.objects.filter(pk=equipment_type)
+        .values_list("version", flat=True)
+        .first()
+    )
+    if version is None:
+        raise Http404("Equipment type not found.")
+
+    etag = f'"{equipment_type}-{version}"'
+    if_none_match = {
+        tag.removeprefix("W/")
+        for tag in parse_etags(request.headers.get("If-None-Match", ""))
+    }
+    if etag in if_none_match or "*" in if_none_match:
+        response = HttpResponseNotModified()
+    else:
+        cache_key = f"store:get_ids:{equipment_type}:{version}"
+        payload = cache.get(cache_key)
+
+        if payload is None:
+            payload = json.dumps(Equipment.get_ids(equipment_type))
+            cache.set(cache_key, payload, GET_IDS_CACHE_TIMEOUT)
+
+        response = HttpResponse(payload, content_type="application/json")
+
+    response["ETag"] = etag
+    response["Cache-Control"] = "private, no-cache"
+    return response
 
 
 def get_label(request):
     """
     Get Label.
     """
-    equipment = Equipment.objects.filter(equipment_type=request.GET["equipment_type"])[
-        0
-    ]
-    return JsonResponse(equipment.set_label, safe=False)
+    equipment_type = EquipmentType.objects.get(pk=request.GET["equipment_type"])
+    return JsonResponse(equipment_type.get_next_label(), safe=False)